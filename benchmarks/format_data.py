@@ -0,0 +1,92 @@
+"""Benchmark HyypAlarmInfos status formatting on synthetic installations.
+
+Run with: python -m benchmarks.format_data
+"""
+from __future__ import annotations
+
+import timeit
+from typing import Any
+
+from pyhyypapi.alarm_info import HyypAlarmInfos
+
+ZONES_PER_PARTITION = 32
+STAY_PROFILES_PER_PARTITION = 4
+PARTITIONS_PER_SITE = 4
+ZONE_COUNTS = (1000, 2000, 4000, 8000, 16000)
+
+
+def synthetic_installation(zone_count: int) -> tuple[dict[Any, Any], dict[Any, Any]]:
+    """Return sync info and state info of an installation with zone_count zones."""
+    partition_count = max(1, zone_count // ZONES_PER_PARTITION)
+    sync_info: dict[Any, Any] = {
+        "sites": [],
+        "partitions": [],
+        "zones": [],
+        "stayProfiles": [],
+    }
+
+    for partition_id in range(partition_count):
+        zone_ids = [
+            partition_id * ZONES_PER_PARTITION + zone
+            for zone in range(ZONES_PER_PARTITION)
+        ]
+        stay_ids = [
+            partition_id * STAY_PROFILES_PER_PARTITION + stay
+            for stay in range(STAY_PROFILES_PER_PARTITION)
+        ]
+        sync_info["partitions"].append(
+            {"id": partition_id, "zoneIds": zone_ids, "stayProfileIds": stay_ids}
+        )
+        sync_info["zones"].extend(
+            {"id": zone_id, "name": f"Zone {zone_id}"} for zone_id in zone_ids
+        )
+        sync_info["stayProfiles"].extend(
+            {"id": stay_id, "name": f"Stay {stay_id}"} for stay_id in stay_ids
+        )
+
+    for site_id in range(0, partition_count, PARTITIONS_PER_SITE):
+        sync_info["sites"].append(
+            {
+                "id": site_id,
+                "partitionIds": list(
+                    range(site_id, min(partition_count, site_id + PARTITIONS_PER_SITE))
+                ),
+            }
+        )
+
+    state_info = {
+        "armedPartitionIds": list(range(0, partition_count, 2)),
+        "armedStayProfileIds": list(
+            range(0, partition_count * STAY_PROFILES_PER_PARTITION, 7)
+        ),
+        "bypassedZoneIds": list(range(0, zone_count, 5)),
+    }
+
+    return sync_info, state_info
+
+
+def main() -> None:
+    """Print formatting time per zone for growing installations."""
+    print(f"{'zones':>8} {'sites':>6} {'ms/run':>10} {'us/zone':>10}")
+
+    for zone_count in ZONE_COUNTS:
+        sync_info, state_info = synthetic_installation(zone_count)
+        last_notices = {
+            site["id"]: {"lastNoticeTime": None, "lastNoticeName": None}
+            for site in sync_info["sites"]
+        }
+        alarm_infos = HyypAlarmInfos(client=None)  # type: ignore[arg-type]
+
+        runs, total = timeit.Timer(
+            lambda: alarm_infos.format_status(sync_info, state_info, last_notices)
+        ).autorange()
+        per_run = total / runs
+
+        print(
+            f"{zone_count:>8} {len(sync_info['sites']):>6} "
+            f"{per_run * 1e3:>10.2f} {per_run / zone_count * 1e6:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Benchmark MCS frame decoding of a recorded or synthetic stream.
+
+Run with: python -m benchmarks.mcs_decode [recorded_stream.bin]
+
+A recorded stream is the raw (decrypted) bytes read from the mtalk socket,
+starting with the version byte.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+
+from pyhyypapi.mcs_framing import McsFrameDecoder
+
+MCS_VERSION = 41
+DATA_MESSAGE_TAG = 8
+HEARTBEAT_PING_TAG = 0
+TLS_RECORD_SIZE = 16 * 1024
+FRAME_COUNT = 20000
+PAYLOAD_SIZES = (0, 40, 300, 1200, 4000)
+
+
+def encode_varint32(value: int) -> bytes:
+    """Return value as protobuf base 128 varint."""
+    res = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            res.append(byte | 0x80)
+        else:
+            res.append(byte)
+            return bytes(res)
+
+
+def synthetic_stream(frame_count: int) -> bytes:
+    """Return a stream of data messages mixed with heartbeats."""
+    frames = [bytes([MCS_VERSION])]
+    for index in range(frame_count):
+        size = PAYLOAD_SIZES[index % len(PAYLOAD_SIZES)]
+        tag = HEARTBEAT_PING_TAG if not size else DATA_MESSAGE_TAG
+        frames.append(bytes([tag]) + encode_varint32(size) + os.urandom(size))
+    return b"".join(frames)
+
+
+class StreamSocket:
+    """Socket replaying a stream, at most one TLS record per receive."""
+
+    def __init__(self, stream: bytes) -> None:
+        """Initialize the socket."""
+        self._stream = memoryview(stream)
+        self._pos = 0
+        self.calls = 0
+
+    def recv(self, size: int) -> bytes:
+        """Return up to size bytes."""
+        self.calls += 1
+        size = min(size, TLS_RECORD_SIZE)
+        data = bytes(self._stream[self._pos : self._pos + size])
+        self._pos += len(data)
+        return data
+
+    def recv_into(self, buffer: bytearray) -> int:
+        """Read up to len(buffer) bytes into buffer."""
+        self.calls += 1
+        size = min(len(buffer), TLS_RECORD_SIZE, len(self._stream) - self._pos)
+        buffer[:size] = self._stream[self._pos : self._pos + size]
+        self._pos += size
+        return size
+
+
+def decode_unbuffered(sock: StreamSocket, frame_count: int) -> int:
+    """Decode frames with one receive per header byte, as before."""
+
+    def read(size: int) -> bytes:
+        buf = b""
+        while len(buf) < size:
+            buf += sock.recv(size - len(buf))
+        return buf
+
+    total = 0
+    read(1)
+    for _ in range(frame_count):
+        read(1)
+        size = 0
+        shift = 0
+        while True:
+            (byte,) = read(1)
+            size |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                break
+            shift += 7
+        total += len(read(size))
+    return total
+
+
+def decode_buffered(sock: StreamSocket, frame_count: int) -> int:
+    """Decode frames with McsFrameDecoder."""
+    decoder = McsFrameDecoder()
+    total = 0
+    decoded = 0
+    while decoded < frame_count:
+        frame = decoder.next_frame()
+        if frame is None:
+            if not decoder.read_from(sock):  # type: ignore[arg-type]
+                break
+            continue
+        total += len(frame[1])
+        decoded += 1
+    return total
+
+
+def count_frames(stream: bytes) -> int:
+    """Return number of complete frames in stream."""
+    decoder = McsFrameDecoder()
+    decoder.feed(stream)
+    count = 0
+    while decoder.next_frame() is not None:
+        count += 1
+    return count
+
+
+def main() -> None:
+    """Print decoding throughput of both readers."""
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as stream_file:
+            stream = stream_file.read()
+    else:
+        stream = synthetic_stream(FRAME_COUNT)
+    frame_count = count_frames(stream)
+
+    print(f"{len(stream)} bytes, {frame_count} frames")
+    print(f"{'reader':>12} {'ms':>10} {'MB/s':>8} {'recv calls':>11}")
+
+    for name, decode in (
+        ("unbuffered", decode_unbuffered),
+        ("buffered", decode_buffered),
+    ):
+        sock = StreamSocket(stream)
+        start = time.perf_counter()
+        decode(sock, frame_count)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>12} {elapsed * 1e3:>10.2f} "
+            f"{len(stream) / elapsed / 1e6:>8.1f} {sock.calls:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
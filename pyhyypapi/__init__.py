@@ -1,17 +1,58 @@
 """init hyyp api exceptions."""
-from .alarm_info import HyypAlarmInfos
+from .alarm_info import HyypAlarmInfos, HyypEntityChange
+from .async_client import AsyncHyypClient
+from .async_push_manager import AsyncPushListenerManager
+from .async_push_receiver import AsyncPushReceiver, async_listen
+from .cache import ResponseCache
 from .client import HyypClient
+from .commands import AsyncHyypCommandTracker, CommandResult, HyypCommandTracker
 from .constants import GCF_SENDER_ID, HyypPkg
-from .exceptions import HTTPError, HyypApiError, InvalidURL
-from .push_receiver import run_example
+from .coordinator import HyypDataCoordinator
+from .dispatch import (
+    AsyncNotificationDispatcher,
+    NotificationDispatcher,
+    OverflowPolicy,
+)
+from .exceptions import HTTPError, HyypApiError, HyypCommandError, InvalidURL
+from .mcs_reconnect import McsReconnect, ReconnectMetrics
+from .persistent_id_store import PersistentIdStore
+from .provisioning import CredentialsStore, KeyPairPool, ProvisioningPipeline
+from .push_bridge import HyypPushBridge
+from .push_receiver import CheckinCache, PushDecryptor, run_example
+from .retry import RetryBudget, RetryPolicy
 
 __all__ = [
     "HyypClient",
+    "AsyncHyypClient",
     "InvalidURL",
     "HTTPError",
     "HyypApiError",
+    "HyypCommandError",
     "HyypPkg",
     "GCF_SENDER_ID",
     "run_example",
+    "AsyncPushReceiver",
+    "async_listen",
+    "AsyncPushListenerManager",
+    "PushDecryptor",
+    "CheckinCache",
+    "PersistentIdStore",
+    "ProvisioningPipeline",
+    "KeyPairPool",
+    "CredentialsStore",
+    "NotificationDispatcher",
+    "AsyncNotificationDispatcher",
+    "OverflowPolicy",
+    "McsReconnect",
+    "ReconnectMetrics",
     "HyypAlarmInfos",
+    "HyypEntityChange",
+    "HyypDataCoordinator",
+    "HyypPushBridge",
+    "HyypCommandTracker",
+    "AsyncHyypCommandTracker",
+    "CommandResult",
+    "RetryPolicy",
+    "RetryBudget",
+    "ResponseCache",
 ]
@@ -1,36 +1,120 @@
 """Alarm info for hass integration."""
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, NamedTuple
 from datetime import datetime
 from .constants import EventNumber
 
 if TYPE_CHECKING:
+    from .async_client import AsyncHyypClient
     from .client import HyypClient
 
+DEFAULT_MAX_WORKERS = 8
+
+
+class HyypEntityChange(NamedTuple):
+    """Entity changed between two status snapshots.
+
+    entity_type is "site", "partition" or "zone".
+    """
+
+    entity_type: str
+    site_id: Any
+    entity_id: Any
+
 
 class HyypAlarmInfos:
     """Initialize Hyyp alarm objects."""
 
-    def __init__(self, client: HyypClient) -> None:
-        """init."""
+    def __init__(
+        self,
+        client: HyypClient | AsyncHyypClient,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> None:
+        """init.
+
+        max_workers limits the number of concurrent requests per refresh.
+        """
         self._client = client
+        self._max_workers = max_workers
         self._sync_info: dict = {}
         self._state_info: dict = {}
+        self._data: dict[Any, Any] = {}
+        self._data_sync_info: dict[Any, Any] = {}
+        self._data_state_info: dict[Any, Any] = {}
+        self._partition_sites: dict[Any, list[Any]] = {}
+        self._stay_partitions: dict[Any, list[tuple[Any, Any]]] = {}
+        self._zone_partitions: dict[Any, list[tuple[Any, Any]]] = {}
+
+    def _fetch_data(self) -> dict[Any, dict[Any, Any]]:
+        """Fetch data via client api, including last site notices."""
+        with ThreadPoolExecutor(max_workers=max(2, self._max_workers)) as executor:
+            _sync_info = executor.submit(self._client.get_sync_info)
+            _state_info = executor.submit(self._client.get_state_info)
+            self._sync_info = _sync_info.result()
+            last_notices = self.last_notices(
+                [site["id"] for site in self._sync_info["sites"]], executor
+            )
+            self._state_info = _state_info.result()
+
+        return last_notices
+
+    async def _async_fetch_data(self) -> dict[Any, dict[Any, Any]]:
+        """Fetch data via asyncio client api, including last site notices."""
+        self._sync_info, self._state_info = await asyncio.gather(
+            self._client.get_sync_info(), self._client.get_state_info()
+        )
 
-    def _fetch_data(self) -> None:
-        """Fetch data via client api."""
-        self._sync_info = self._client.get_sync_info()
-        self._state_info = self._client.get_state_info()
+        return await self.async_last_notices(
+            [site["id"] for site in self._sync_info["sites"]]
+        )
 
     def _last_notice(self, site_id: int) -> dict[Any, Any]:
         """Get last notification."""
-        _response: dict[Any, Any] = {"lastNoticeTime": None, "lastNoticeName": None}
-
         _last_notification = self._client.site_notifications(
             site_id=site_id, json_key=0
         )
 
+        return self.parse_notice(_last_notification)
+
+    def last_notices(
+        self, site_ids: list[Any], executor: Executor | None = None
+    ) -> dict[Any, dict[Any, Any]]:
+        """Get last notification of sites concurrently."""
+        if len(site_ids) < 2 and executor is None:
+            return {site_id: self._last_notice(site_id) for site_id in site_ids}
+
+        if executor is None:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as _executor:
+                return dict(zip(site_ids, _executor.map(self._last_notice, site_ids)))
+
+        return dict(zip(site_ids, executor.map(self._last_notice, site_ids)))
+
+    async def async_last_notices(
+        self, site_ids: list[Any]
+    ) -> dict[Any, dict[Any, Any]]:
+        """Get last notification of sites concurrently using the asyncio client."""
+        semaphore = asyncio.Semaphore(self._max_workers)
+
+        async def _async_last_notice(site_id: Any) -> dict[Any, Any]:
+            async with semaphore:
+                return self.parse_notice(
+                    await self._client.site_notifications(site_id=site_id, json_key=0)
+                )
+
+        _notices = await asyncio.gather(
+            *(_async_last_notice(site_id) for site_id in site_ids)
+        )
+
+        return dict(zip(site_ids, _notices))
+
+    @staticmethod
+    def parse_notice(_last_notification: Any) -> dict[Any, Any]:
+        """Format last notification."""
+        _response: dict[Any, Any] = {"lastNoticeTime": None, "lastNoticeName": None}
+
         if _last_notification:
 
             _last_event = _last_notification["eventNumber"]
@@ -45,13 +129,71 @@ class HyypAlarmInfos:
 
         return _response
 
-    def _format_data(self) -> dict[Any, Any]:
-        """Format data for Hass."""
+    def _format_partition(
+        self,
+        partition: dict[Any, Any],
+        zone_ids: dict[Any, dict[Any, Any]],
+        stay_ids: dict[Any, dict[Any, Any]],
+        bypassed_zone_ids: set[Any],
+        armed_partition_ids: set[Any],
+        armed_stay_profile_ids: set[Any],
+    ) -> dict[Any, Any]:
+        """Return partition with its zones, stay profiles and armed state."""
+
+        _partition = dict(partition)
+
+        # Add zone info and zone bypass info to partition.
+        _partition["zones"] = {
+            zone_id: {**zone_ids[zone_id], "bypassed": zone_id in bypassed_zone_ids}
+            for zone_id in partition["zoneIds"]
+            if zone_id in zone_ids
+        }
+
+        # Add stay profile info.
+        _partition["stayProfiles"] = {
+            stay_id: stay_ids[stay_id]
+            for stay_id in partition["stayProfileIds"]
+            if stay_id in stay_ids
+        }
+
+        # Add partition armed status.
+        _partition["armed"] = partition["id"] in armed_partition_ids
+
+        # Add partition stay_armed status.
+        self._set_stay_armed(_partition, armed_stay_profile_ids)
+
+        return _partition
+
+    @staticmethod
+    def _set_stay_armed(
+        partition: dict[Any, Any], armed_stay_profile_ids: set[Any]
+    ) -> None:
+        """Set stay armed status of a formatted partition."""
+        if not partition["stayProfiles"]:
+            return
+
+        _armed_stay_name = next(
+            (
+                stay_profile["name"]
+                for stay_id, stay_profile in partition["stayProfiles"].items()
+                if stay_id in armed_stay_profile_ids
+            ),
+            None,
+        )
+        partition["stayArmed"] = _armed_stay_name is not None
+        partition["stayArmedProfileName"] = _armed_stay_name
+
+    def _format_data(
+        self, last_notices: dict[Any, dict[Any, Any]] | None = None
+    ) -> dict[Any, Any]:
+        """Format data for Hass.
+
+        Builds new dicts from id indexes, sync info is left unmodified.
+        """
 
         # The API returns data from site level.
         # Partitions are used as entity that actions are performed on.
 
-        site_ids = {site["id"]: site for site in self._sync_info["sites"]}
         zone_ids = {zone["id"]: zone for zone in self._sync_info["zones"]}
         stay_ids = {
             stay_profile["id"]: stay_profile
@@ -60,67 +202,205 @@ class HyypAlarmInfos:
         partition_ids = {
             partition["id"]: partition for partition in self._sync_info["partitions"]
         }
+        bypassed_zone_ids = set(self._state_info["bypassedZoneIds"])
+        armed_partition_ids = set(self._state_info["armedPartitionIds"])
+        armed_stay_profile_ids = set(self._state_info["armedStayProfileIds"])
+
+        site_ids: dict[Any, Any] = {}
 
-        for site in site_ids:
+        for site in self._sync_info["sites"]:
 
             # Add last site notification.
-            _last_notice = self._last_notice(site_id=site)
-            site_ids[site]["lastNoticeTime"] = _last_notice["lastNoticeTime"]
-            site_ids[site]["lastNoticeName"] = _last_notice["lastNoticeName"]
-
-            # Add partition info.
-            site_ids[site]["partitions"] = {
-                partition_id: partition_ids[partition_id]
-                for partition_id in site_ids[site]["partitionIds"]
+            _last_notice = (
+                last_notices[site["id"]]
+                if last_notices is not None
+                else self._last_notice(site_id=site["id"])
+            )
+
+            site_ids[site["id"]] = {
+                **site,
+                "lastNoticeTime": _last_notice["lastNoticeTime"],
+                "lastNoticeName": _last_notice["lastNoticeName"],
+                # Add partition info.
+                "partitions": {
+                    partition_id: self._format_partition(
+                        partition_ids[partition_id],
+                        zone_ids,
+                        stay_ids,
+                        bypassed_zone_ids,
+                        armed_partition_ids,
+                        armed_stay_profile_ids,
+                    )
+                    for partition_id in site["partitionIds"]
+                },
             }
 
-            for partition in partition_ids:
-                # Add zone info to partition.
-                site_ids[site]["partitions"][partition]["zones"] = {
-                    key: value
-                    for (key, value) in zone_ids.items()
-                    if key in site_ids[site]["partitions"][partition]["zoneIds"]
+        return site_ids
+
+    def format_status(
+        self,
+        sync_info: dict[Any, Any],
+        state_info: dict[Any, Any],
+        last_notices: dict[Any, dict[Any, Any]],
+    ) -> dict[Any, Any]:
+        """Return the status of Hyyp connected alarms from already fetched data."""
+
+        self._sync_info = sync_info
+        self._state_info = state_info
+
+        return self._format_data(last_notices)
+
+    def _index_data(self) -> None:
+        """Index formatted snapshot by partition, stay profile and zone id."""
+        self._partition_sites = {}
+        self._stay_partitions = {}
+        self._zone_partitions = {}
+
+        for site_id, site in self._data.items():
+            for partition_id, partition in site["partitions"].items():
+                self._partition_sites.setdefault(partition_id, []).append(site_id)
+                for stay_id in partition["stayProfiles"]:
+                    self._stay_partitions.setdefault(stay_id, []).append(
+                        (site_id, partition_id)
+                    )
+                for zone_id in partition["zones"]:
+                    self._zone_partitions.setdefault(zone_id, []).append(
+                        (site_id, partition_id)
+                    )
+
+    def _patch_data(
+        self,
+        previous_state: dict[Any, Any],
+        last_notices: dict[Any, dict[Any, Any]],
+    ) -> tuple[dict[Any, Any], list[HyypEntityChange]]:
+        """Patch previous snapshot with state and notice changes.
+
+        Changed sites, partitions and zones are copied before being modified,
+        unchanged ones are shared with the previous snapshot.
+        """
+        data = dict(self._data)
+        changes: dict[HyypEntityChange, None] = {}
+        copied: set[Any] = set()
+
+        def _diff(key: str) -> tuple[set[Any], set[Any]]:
+            _current = set(self._state_info[key])
+            return _current ^ set(previous_state[key]), _current
+
+        def _site(site_id: Any) -> dict[Any, Any]:
+            if site_id not in copied:
+                copied.add(site_id)
+                data[site_id] = {
+                    **data[site_id],
+                    "partitions": dict(data[site_id]["partitions"]),
                 }
+            return data[site_id]
 
-                # Add zone bypass info to zone.
-                for zone in site_ids[site]["partitions"][partition]["zones"]:
-                    site_ids[site]["partitions"][partition]["zones"][zone][
-                        "bypassed"
-                    ] = bool(zone in self._state_info["bypassedZoneIds"])
-
-                # Add stay profile info.
-                site_ids[site]["partitions"][partition]["stayProfiles"] = {
-                    key: value
-                    for (key, value) in stay_ids.items()
-                    if key in site_ids[site]["partitions"][partition]["stayProfileIds"]
+        def _partition(site_id: Any, partition_id: Any) -> dict[Any, Any]:
+            _partitions = _site(site_id)["partitions"]
+            if (site_id, partition_id) not in copied:
+                copied.add((site_id, partition_id))
+                _partitions[partition_id] = {
+                    **_partitions[partition_id],
+                    "zones": dict(_partitions[partition_id]["zones"]),
                 }
+            changes[HyypEntityChange("partition", site_id, partition_id)] = None
+            return _partitions[partition_id]
 
-                # Add partition armed status.
-                site_ids[site]["partitions"][partition]["armed"] = bool(
-                    partition in self._state_info["armedPartitionIds"]
+        _changed, armed_partition_ids = _diff("armedPartitionIds")
+        for partition_id in _changed:
+            for site_id in self._partition_sites.get(partition_id, ()):
+                _partition(site_id, partition_id)["armed"] = (
+                    partition_id in armed_partition_ids
                 )
 
-                # Add partition stay_armed status.
-                for stay_profile in site_ids[site]["partitions"][partition][
-                    "stayProfiles"
-                ]:
-                    site_ids[site]["partitions"][partition]["stayArmed"] = bool(
-                        stay_profile in self._state_info["armedStayProfileIds"]
-                    )
-                    site_ids[site]["partitions"][partition]["stayArmedProfileName"] = (
-                        site_ids[site]["partitions"][partition]["stayProfiles"][
-                            stay_profile
-                        ]["name"]
-                        if stay_profile in self._state_info["armedStayProfileIds"]
-                        else None
-                    )
+        _changed, armed_stay_profile_ids = _diff("armedStayProfileIds")
+        for stay_id in _changed:
+            for site_id, partition_id in self._stay_partitions.get(stay_id, ()):
+                self._set_stay_armed(
+                    _partition(site_id, partition_id), armed_stay_profile_ids
+                )
 
-        return site_ids
+        _changed, bypassed_zone_ids = _diff("bypassedZoneIds")
+        for zone_id in _changed:
+            for site_id, partition_id in self._zone_partitions.get(zone_id, ()):
+                _zones = _partition(site_id, partition_id)["zones"]
+                _zones[zone_id] = {
+                    **_zones[zone_id],
+                    "bypassed": zone_id in bypassed_zone_ids,
+                }
+                changes[HyypEntityChange("zone", site_id, zone_id)] = None
+
+        for site_id, _last_notice in last_notices.items():
+            if site_id in data and any(
+                data[site_id][key] != value for key, value in _last_notice.items()
+            ):
+                _site(site_id).update(_last_notice)
+                changes[HyypEntityChange("site", site_id, site_id)] = None
+
+        return data, list(changes)
+
+    def format_status_changes(
+        self,
+        sync_info: dict[Any, Any],
+        state_info: dict[Any, Any],
+        last_notices: dict[Any, dict[Any, Any]],
+    ) -> tuple[dict[Any, Any], list[HyypEntityChange]]:
+        """Return status and changed entities since the previous call.
+
+        The previous snapshot is patched when only state info and notices
+        changed. It is rebuilt, reporting every site as changed, on the first
+        call or when sync info changed.
+        """
+        self._sync_info = sync_info
+        self._state_info = state_info
+
+        if not self._data or sync_info != self._data_sync_info:
+            self._data = self._format_data(last_notices)
+            self._index_data()
+            changes = [
+                HyypEntityChange("site", site_id, site_id) for site_id in self._data
+            ]
+
+        else:
+            self._data, changes = self._patch_data(self._data_state_info, last_notices)
+
+        self._data_sync_info = sync_info
+        self._data_state_info = state_info
+
+        return self._data, changes
+
+    def status_changes(self) -> tuple[dict[Any, Any], list[HyypEntityChange]]:
+        """Return the status of Hyyp connected alarms and changed entities."""
+
+        last_notices = self._fetch_data()
+
+        return self.format_status_changes(
+            self._sync_info, self._state_info, last_notices
+        )
+
+    async def async_status_changes(
+        self,
+    ) -> tuple[dict[Any, Any], list[HyypEntityChange]]:
+        """Return status and changed entities using the asyncio client."""
+
+        last_notices = await self._async_fetch_data()
+
+        return self.format_status_changes(
+            self._sync_info, self._state_info, last_notices
+        )
 
     def status(self) -> dict[Any, Any]:
         """Return the status of Hyyp connected alarms."""
 
-        self._fetch_data()
-        formatted_data: dict[Any, Any] = self._format_data()
+        last_notices = self._fetch_data()
+        formatted_data: dict[Any, Any] = self._format_data(last_notices)
+
+        return formatted_data
+
+    async def async_status(self) -> dict[Any, Any]:
+        """Return the status of Hyyp connected alarms using the asyncio client."""
+
+        last_notices = await self._async_fetch_data()
+        formatted_data: dict[Any, Any] = self._format_data(last_notices)
 
         return formatted_data
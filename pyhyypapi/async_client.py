@@ -0,0 +1,393 @@
+"""Hyyp asyncio Client API."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Mapping
+
+import aiohttp
+
+from .alarm_info import HyypAlarmInfos
+from .base_client import HyypBaseClient
+from .cache import ResponseCache
+from .coalesce import AsyncSingleFlight
+from .constants import DEFAULT_TIMEOUT, REQUEST_HEADER, HyypPkg
+from .endpoints import ENDPOINTS, Endpoint, json_value
+from .exceptions import HTTPError, HyypApiError, InvalidURL
+from .retry import RetryPolicy
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CONNECTION_LIMIT = 100
+
+# Failures while connecting, the request never reached the server. Matches
+# what the sync client finds in the cause chain of requests errors.
+_CONNECT_ERRORS: tuple[type[BaseException], ...] = (aiohttp.ClientConnectorError,)
+if hasattr(aiohttp, "ConnectionTimeoutError"):  # aiohttp >= 3.10
+    _CONNECT_ERRORS += (aiohttp.ConnectionTimeoutError,)
+
+
+def _encode_params(params: dict[Any, Any]) -> list[tuple[str, str]]:
+    """Encode query parameters the same way requests does.
+
+    aiohttp refuses None and bool values, requests drops None values,
+    stringifies everything else and expands iterables into repeated keys.
+    """
+    encoded: list[tuple[str, str]] = []
+
+    for key, value in params.items():
+        if value is None:
+            continue
+
+        values = (
+            value
+            if hasattr(value, "__iter__") and not isinstance(value, (str, bytes))
+            else [value]
+        )
+
+        for item in values:
+            if item is not None:
+                encoded.append((str(key), str(item)))
+
+    return encoded
+
+
+class AsyncHyypClient(HyypBaseClient):
+    """Initialize asyncio api client object."""
+
+    def __init__(
+        self,
+        email: str | None = None,
+        password: str | None = None,
+        pkg: str = HyypPkg.ADT_SECURE_HOME.value,
+        timeout: int = DEFAULT_TIMEOUT,
+        token: str | None = None,
+        session: aiohttp.ClientSession | None = None,
+        connection_limit: int = DEFAULT_CONNECTION_LIMIT,
+        retry_policy: RetryPolicy | None = None,
+        cache: ResponseCache | None = None,
+        cache_ttls: Mapping[str, float] | None = None,
+    ) -> None:
+        """Initialize the client object.
+
+        A shared aiohttp session can be passed in to pool connections across
+        several clients, otherwise one is created on first use.
+        """
+        super().__init__(
+            email=email,
+            password=password,
+            pkg=pkg,
+            token=token,
+            retry_policy=retry_policy,
+            cache=cache,
+            cache_ttls=cache_ttls,
+        )
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._single_flight = AsyncSingleFlight()
+        self._connection_limit = connection_limit
+        self._session = session
+        self._close_session = session is None
+
+    async def __aenter__(self) -> AsyncHyypClient:
+        """Enter async context manager."""
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Close session on context manager exit."""
+        await self.close_session()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled http session, creating it if needed."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=REQUEST_HEADER,
+                connector=aiohttp.TCPConnector(limit=self._connection_limit),
+            )
+            self._close_session = True
+
+        return self._session
+
+    async def _request(self, endpoint: Endpoint, **kwargs: Any) -> dict[Any, Any]:
+        """Return decoded json of endpoint, from the response cache if fresh.
+
+        Identical concurrent read-only requests share one in-flight request.
+        """
+
+        _params = self._endpoint_params(endpoint, **kwargs)
+        _key, _response_text = self._cached_response(endpoint, _params)
+        if _response_text is not None:
+            return endpoint.decode(_response_text)
+
+        try:
+            if endpoint.read_only:
+                _response_text = await self._single_flight.do(
+                    self._flight_key(endpoint, _params),
+                    lambda: self._send(endpoint, _params),
+                )
+            else:
+                _response_text = await self._send(endpoint, _params)
+            _json_result = endpoint.decode(_response_text)
+
+        finally:
+            self._invalidate_stale(endpoint)
+
+        self._cache_response(endpoint, _key, _response_text)
+
+        return _json_result
+
+    async def _send(self, endpoint: Endpoint, params: dict[str, Any]) -> str:
+        """Send request to endpoint, retrying per policy, and return response text."""
+
+        _params = _encode_params(params)
+        attempt = 0
+
+        while True:
+            try:
+                async with self._get_session().request(
+                    endpoint.method,
+                    endpoint.url,
+                    allow_redirects=False,
+                    params=_params,
+                    timeout=self._timeout,
+                ) as req:
+                    req.raise_for_status()
+                    _response_text = await req.text()
+
+            except aiohttp.ClientResponseError as err:
+                delay = self._retry_policy.retry_delay(
+                    endpoint,
+                    attempt,
+                    status=err.status,
+                    retry_after=err.headers.get("Retry-After") if err.headers else None,
+                )
+                if delay is None:
+                    raise HTTPError from err
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                delay = self._retry_policy.retry_delay(
+                    endpoint,
+                    attempt,
+                    request_sent=not isinstance(err, _CONNECT_ERRORS),
+                )
+                if delay is None:
+                    raise InvalidURL("A Invalid URL or Proxy error occured") from err
+
+            else:
+                self._retry_policy.record_success()
+                return _response_text
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def login(self) -> Any:
+        """Login to ADT Secure Home API."""
+
+        _json_result = await self._request(
+            ENDPOINTS["login"], email=self._email, password=self._password
+        )
+
+        self._set_token(_json_result["token"])
+
+        return _json_result
+
+    async def check_app_version(self) -> Any:
+        """Check App version via API."""
+
+        return await self._request(ENDPOINTS["check_app_version"])
+
+    async def load_alarm_infos(self) -> dict[Any, Any]:
+        """Get alarm infos formatted for hass infos."""
+
+        return await HyypAlarmInfos(self).async_status()
+
+    async def site_notifications(
+        self, site_id: int, timestamp: int | None = None, json_key: int | None = None
+    ) -> Any:
+        """Get site notifications from API."""
+
+        _json_result = await self._request(
+            ENDPOINTS["site_notifications"], site_id=site_id, timestamp=timestamp
+        )
+
+        if json_key is None or not _json_result["listSiteNotifications"][str(site_id)]:
+            return _json_result["listSiteNotifications"][str(site_id)]
+
+        return _json_result["listSiteNotifications"][str(site_id)][json_key]
+
+    async def set_notification_subscriptions(
+        self,
+        trouble_notifications: bool = True,
+        emergency_notifications: bool = True,
+        user_notifications: bool = True,
+        information_notifications: bool = True,
+        test_report_notifications: bool = False,
+    ) -> Any:
+        """Enable or disable app notifications."""
+
+        return await self._request(
+            ENDPOINTS["set_notification_subscriptions"],
+            trouble_notifications=trouble_notifications,
+            emergency_notifications=emergency_notifications,
+            user_notifications=user_notifications,
+            information_notifications=information_notifications,
+            test_report_notifications=test_report_notifications,
+        )
+
+    async def get_camera_by_partition(
+        self, partition_id: int, json_key: str | None = None
+    ) -> Any:
+        """Get cameras, bypassed zones and zone ids by partition from API."""
+
+        return json_value(
+            await self._request(
+                ENDPOINTS["get_camera_by_partition"], partition_id=partition_id
+            ),
+            json_key,
+        )
+
+    async def get_sync_info(self, json_key: str | None = None) -> Any:
+        """Get user, site, partition and users info from API."""
+
+        return json_value(await self._request(ENDPOINTS["get_sync_info"]), json_key)
+
+    async def get_state_info(self, json_key: str | None = None) -> Any:
+        """Get state info from API. Returns armed, bypassed partition ids."""
+
+        return json_value(await self._request(ENDPOINTS["get_state_info"]), json_key)
+
+    async def get_notification_subscriptions(self, json_key: str | None = None) -> Any:
+        """Get notification subscriptions from API."""
+
+        return json_value(
+            await self._request(ENDPOINTS["get_notification_subscriptions"]), json_key
+        )
+
+    async def get_user_preferences(
+        self, user_id: int, site_id: int | None = None, json_key: str | None = None
+    ) -> Any:
+        """Get user preferences from API."""
+
+        return json_value(
+            await self._request(
+                ENDPOINTS["get_user_preferences"], user_id=user_id, site_id=site_id
+            ),
+            json_key,
+        )
+
+    async def get_security_companies(self, json_key: str | None = None) -> Any:
+        """Get security companies from API."""
+
+        return json_value(
+            await self._request(ENDPOINTS["get_security_companies"]), json_key
+        )
+
+    async def store_gcm_registrationid(self, gcm_id: str | None = None) -> Any:
+        """Store gcmid."""
+
+        return await self._request(ENDPOINTS["store_gcm_registrationid"], gcm_id=gcm_id)
+
+    async def set_user_preference(
+        self,
+        store_for: str,
+        new_code: int,
+        site_id: str,
+        partition_id: str,
+    ) -> Any:
+        """Set user code preferences."""
+
+        if store_for not in ["Arm", "Bypass"]:
+            raise HyypApiError("Invalid selection, choose between Arm or Bypass")
+
+        _name = (
+            "site." + site_id + ".partition." + partition_id + ".storeFor" + store_for
+        )
+
+        return await self._request(
+            ENDPOINTS["set_user_preference"],
+            site_id=site_id,
+            name=_name,
+            preference_value=new_code,
+        )
+
+    async def set_subuser_preference(
+        self,
+        user_id: str,
+        site_id: str | None = None,
+        partition_id: str | None = None,
+        partition_pin: str | None = None,
+        stay_profile_id: int | None = None,
+    ) -> Any:
+        """Set sub user preferences."""
+
+        return await self._request(
+            ENDPOINTS["set_subuser_preference"],
+            site_id=site_id,
+            user_id=user_id,
+            partitions={0: {".id": partition_id, ".pin": partition_pin}},
+            stayProfileIds={0: stay_profile_id},
+        )
+
+    async def arm_site(
+        self,
+        site_id: int,
+        arm: bool = True,
+        pin: int | None = None,
+        partition_id: int | None = None,
+        stay_profile_id: int | None = None,
+    ) -> Any:
+        """Arm alarm or stay profile via API."""
+
+        return await self._request(
+            ENDPOINTS["arm_site"],
+            arm=arm,
+            pin=pin,
+            partition_id=partition_id,
+            site_id=site_id,
+            stay_profile_id=stay_profile_id,
+        )
+
+    # Untested.
+    async def trigger_alarm(
+        self,
+        site_id: int,
+        pin: int | None = None,
+        partition_id: int | None = None,
+        trigger_id: int | None = None,
+    ) -> Any:
+        """Trigger Alarm via API."""
+
+        return await self._request(
+            ENDPOINTS["trigger_alarm"],
+            pin=pin,
+            partition_id=partition_id,
+            site_id=site_id,
+            trigger_id=trigger_id,
+        )
+
+    async def set_zone_bypass(
+        self,
+        zones: int,
+        partition_id: int | None = None,
+        stay_profile_id: int = 0,
+        pin: int | None = None,
+    ) -> Any:
+        """Set/toggle zone bypass."""
+
+        return await self._request(
+            ENDPOINTS["set_zone_bypass"],
+            partition_id=partition_id,
+            zones=zones,
+            stay_profile_id=stay_profile_id,
+            pin=pin,
+        )
+
+    async def logout(self) -> None:
+        """Close ADT Secure Home session."""
+        await self.close_session()
+
+    async def close_session(self) -> None:
+        """Close the http session if this client owns it."""
+        if self._session and self._close_session:
+            await self._session.close()
+
+        self._session = None
@@ -0,0 +1,171 @@
+"""Run the push listeners of many accounts on one event loop."""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import logging
+import ssl
+from typing import Any, Awaitable, Callable
+
+from .async_push_receiver import AsyncPushReceiver
+from .mcs_pb2 import DataMessageStanza
+from .mcs_reconnect import ReconnectMetrics
+from .push_receiver import CheckinCache, PushDecryptor
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_START_INTERVAL_SECS = 0.05
+
+Handler = Callable[[Any, Any, DataMessageStanza], "Awaitable[None] | None"]
+
+
+class AsyncPushListenerManager:
+    """Multiplex the MCS connections of many credentials sets.
+
+    Each account gets one AsyncPushReceiver task on the running loop, they
+    share the TLS context, a CheckinCache, the key cache of one PushDecryptor
+    and a small thread pool for check-ins and decryption. Notifications are
+    routed to the handler registered with the account's credentials.
+    Listeners are started start_interval seconds apart to spread logins.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        start_interval: float = DEFAULT_START_INTERVAL_SECS,
+        ssl_context: ssl.SSLContext | None = None,
+        checkin_cache: CheckinCache | None = None,
+        **receiver_kwargs: Any,
+    ) -> None:
+        """Initialize the manager.
+
+        Pass a checkin_cache with on_update to persist refreshed check-ins.
+        receiver_kwargs are passed to every AsyncPushReceiver, e.g. heartbeat
+        settings.
+        """
+        self._start_interval = start_interval
+        self._ssl_context = ssl_context
+        self._receiver_kwargs = receiver_kwargs
+        self._decryptor = PushDecryptor()
+        self._checkin_cache = checkin_cache or CheckinCache()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="AsyncPushListenerManager"
+        )
+        self._receivers: dict[str, AsyncPushReceiver] = {}
+        self._handlers: dict[str, tuple[Handler, Any]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._running = False
+
+    def __len__(self) -> int:
+        """Return number of accounts."""
+        return len(self._receivers)
+
+    def __contains__(self, token: object) -> bool:
+        """Return True if an account with fcm token is managed."""
+        return token in self._receivers
+
+    def add(
+        self,
+        credentials: dict[str, Any],
+        handler: Handler,
+        obj: Any = None,
+        **kwargs: Any,
+    ) -> str:
+        """Add an account, returns its fcm token.
+
+        handler(obj, notification, data_message): called on notifications of
+        this account, may be a coroutine function. kwargs are passed to its
+        AsyncPushReceiver, e.g. persistent_id_store.
+        """
+        token = credentials["fcm"]["token"]
+        if token in self._receivers:
+            raise ValueError(f"Credentials of {token} already added")
+
+        self._receivers[token] = AsyncPushReceiver(
+            credentials,
+            decryptor=self._decryptor,
+            ssl_context=self._ssl_context,
+            executor=self._executor,
+            checkin_cache=self._checkin_cache,
+            **{**self._receiver_kwargs, **kwargs},
+        )
+        self._handlers[token] = (handler, obj)
+        if self._running:
+            self._start(token)
+        return token
+
+    async def remove(self, token: str) -> None:
+        """Stop listening for an account."""
+        task = self._tasks.pop(token, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        self._receivers.pop(token, None)
+        self._handlers.pop(token, None)
+        self._decryptor.remove(token)
+
+    def metrics(self) -> dict[str, ReconnectMetrics]:
+        """Return connection metrics by fcm token."""
+        return {
+            token: receiver.reconnect.metrics
+            for token, receiver in self._receivers.items()
+        }
+
+    async def _listen(self, token: str) -> None:
+        """Route the notifications of one account to its handler."""
+        async for notification, data_message in self._receivers[token]:
+            handler, obj = self._handlers[token]
+            try:
+                result = handler(obj, notification, data_message)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error handling notification of %s", token)
+
+    def _listen_done(self, token: str, task: asyncio.Task) -> None:
+        """Log the error ending the listener task of an account."""
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.error("Listener of %s stopped", token, exc_info=task.exception())
+
+    def _start(self, token: str) -> None:
+        """Start the listener task of an account."""
+        task = asyncio.ensure_future(self._listen(token))
+        task.add_done_callback(functools.partial(self._listen_done, token))
+        self._tasks[token] = task
+
+    async def start(self) -> None:
+        """Start the listeners of all accounts on the running loop."""
+        if self._running:
+            return
+
+        self._running = True
+        for token in list(self._receivers):
+            if token not in self._tasks and token in self._receivers:
+                self._start(token)
+                await asyncio.sleep(self._start_interval)
+
+    async def stop(self) -> None:
+        """Stop all listeners and close their connections, start() resumes."""
+        self._running = False
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Stop all listeners and shut down the thread pool for good."""
+        await self.stop()
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> AsyncPushListenerManager:
+        """Start the listeners."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Stop the listeners and shut down the thread pool."""
+        await self.close()
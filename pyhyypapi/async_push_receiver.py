@@ -0,0 +1,287 @@
+"""Receive GCM/FCM messages from google using asyncio streams."""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+import logging
+import ssl
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from .mcs_framing import DEFAULT_CHUNK_SIZE, McsFrameDecoder
+from .mcs_heartbeat import (
+    DEFAULT_HEARTBEAT_ACK_TIMEOUT_SECS,
+    DEFAULT_HEARTBEAT_INTERVAL_SECS,
+    McsHeartbeat,
+    set_keepalive,
+)
+from .mcs_pb2 import Close, DataMessageStanza, HeartbeatPing, LoginResponse
+from .mcs_reconnect import McsReconnect
+from .mcs_stream import McsStreamTracker
+from .mcs_transport import open_tls_connection
+from .persistent_id_store import PersistentIdStore
+from .push_receiver import (
+    GOOGLE_MTALK_ENDPOINT,
+    LOGIN_TIMEOUT_SECS,
+    MTALK_PORT,
+    CheckinCache,
+    PushDecryptor,
+    _check_version,
+    _encode_packet,
+    _heartbeat_ack,
+    _login_request,
+    _parse_packet,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AsyncPushReceiver:
+    """MCS push notification listener on asyncio streams.
+
+    Iterate over the receiver to get (notification, data_message) tuples.
+    The connection is (re)established as needed while iterating.
+    """
+
+    def __init__(
+        self,
+        credentials: dict[str, Any],
+        received_persistent_ids: list[str] | None = None,
+        decryptor: PushDecryptor | None = None,
+        persistent_id_store: PersistentIdStore | None = None,
+        heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL_SECS,
+        heartbeat_ack_timeout: float = DEFAULT_HEARTBEAT_ACK_TIMEOUT_SECS,
+        reconnect: McsReconnect | None = None,
+        ssl_context: ssl.SSLContext | None = None,
+        executor: Executor | None = None,
+        checkin_cache: CheckinCache | None = None,
+    ) -> None:
+        """Initialize the receiver.
+
+        credentials: credentials object returned by register()
+        received_persistent_ids: any persistent id's you already received.
+        decryptor: decryptor shared between receivers, credentials are added.
+        persistent_id_store: store used to skip duplicates, its most recent ids
+                             are acked on login without received_persistent_ids.
+        heartbeat_interval: seconds without traffic before pinging the server.
+        heartbeat_ack_timeout: seconds to wait for an answer to a ping.
+        reconnect: state machine pacing reconnects and counting them.
+        ssl_context: TLS context, defaults to the one shared by the process.
+        executor: executor running check-ins and decryption, None decrypts
+                  on the event loop.
+        checkin_cache: check-in cache shared between receivers.
+        """
+        self._credentials = credentials
+        self._decryptor = decryptor or PushDecryptor()
+        self._token = self._decryptor.add(credentials)
+        if received_persistent_ids is None and persistent_id_store is not None:
+            received_persistent_ids = persistent_id_store.recent()
+        self._tracker = McsStreamTracker(
+            received_persistent_ids, store=persistent_id_store
+        )
+        self._heartbeat = McsHeartbeat(heartbeat_interval, heartbeat_ack_timeout)
+        self.reconnect = reconnect or McsReconnect()
+        self._checkin_cache = checkin_cache or CheckinCache()
+        self._ssl_context = ssl_context
+        self._executor = executor
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._decoder: McsFrameDecoder | None = None
+
+    @property
+    def persistent_ids(self) -> list[str]:
+        """Return received ids not confirmed as acked by the server."""
+        return self._tracker.persistent_ids
+
+    async def _send(self, data: Any) -> None:
+        """Send a MCS packet."""
+        assert self._writer is not None
+        self._tracker.on_send(data)
+        self._writer.write(_encode_packet(data))
+        await self._writer.drain()
+
+    async def _send_ack(self) -> None:
+        """Send the ack of received persistent ids, if due."""
+        ack = self._tracker.ack()
+        if ack is not None:
+            await self._send(ack)
+
+    async def _recv(self, first: bool = False) -> Any:
+        """Read a MCS packet, skipping unsupported packets."""
+        assert self._reader is not None and self._decoder is not None
+        while True:
+            frame = self._decoder.next_frame()
+            while frame is None:
+                chunk = await self._reader.read(DEFAULT_CHUNK_SIZE)
+                if not chunk:
+                    raise EOFError("connection closed by server")
+                self._decoder.feed(chunk)
+                frame = self._decoder.next_frame()
+
+            tag, payload = frame
+            if first:
+                _check_version(self._decoder.version)
+            _LOGGER.debug("size %s", len(payload))
+            packet = _parse_packet(tag, payload)
+            self._heartbeat.on_receive(time.monotonic())
+            if packet is not None:
+                self._tracker.on_receive(packet)
+                return packet
+
+    async def _recv_alive(self) -> Any:
+        """Read a MCS packet, pinging the server while the link is idle.
+
+        Raises TimeoutError when a ping goes unanswered.
+        """
+        while True:
+            try:
+                return await asyncio.wait_for(
+                    self._recv(), self._heartbeat.timeout(time.monotonic())
+                )
+            except asyncio.TimeoutError:
+                ping = self._heartbeat.poll(time.monotonic())
+                if ping is not None:
+                    _LOGGER.debug("Sending heartbeat ping")
+                    await self._send(ping)
+
+    async def _decrypt(self, data: DataMessageStanza) -> Any:
+        """Decrypt a data message, in the executor when one is set."""
+        if self._executor is None:
+            return self._decryptor.decrypt(data, self._token)
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._decryptor.decrypt, data, self._token
+        )
+
+    async def connect(self) -> None:
+        """Check in, open the mtalk connection and login.
+
+        Check-in results are reused while fresh, see CheckinCache.
+        """
+        if "checkin" in self._credentials:
+            self._checkin_cache.ensure(self._credentials)
+        else:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._checkin_cache.ensure, self._credentials
+            )
+
+        self._reader, self._writer = await open_tls_connection(
+            GOOGLE_MTALK_ENDPOINT, MTALK_PORT, self._ssl_context
+        )
+        set_keepalive(self._writer.get_extra_info("socket"))
+        self._decoder = McsFrameDecoder()
+        _LOGGER.debug("connected to ssl socket")
+
+        self._tracker.reset()
+        await self._send(_login_request(self._credentials, self.persistent_ids))
+        login_response = await asyncio.wait_for(
+            self._recv(first=True), LOGIN_TIMEOUT_SECS
+        )
+        if not isinstance(login_response, LoginResponse):
+            raise ConnectionError(f"Unexpected login response {login_response}")
+        _LOGGER.debug("Received login response: %s", login_response)
+        self._heartbeat.start(login_response, time.monotonic())
+        await self._send_ack()
+
+    async def close(self) -> None:
+        """Close the mtalk connection."""
+        if self._writer is None:
+            return
+
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (OSError, ssl.SSLError) as err:
+            _LOGGER.debug("Unable to close connection %s", err)
+
+        self._reader = self._writer = None
+        self._decoder = None
+
+    async def notifications(self) -> AsyncIterator[tuple[Any, DataMessageStanza]]:
+        """Yield decrypted notifications, reconnecting when the link drops."""
+        try:
+            while True:
+                if self._writer is None:
+                    delay = self.reconnect.delay(time.monotonic())
+                    if delay:
+                        _LOGGER.debug("Reconnecting in %.1fs", delay)
+                        await asyncio.sleep(delay)
+
+                    self.reconnect.connecting(time.monotonic())
+                    try:
+                        await self.connect()
+
+                    except (OSError, asyncio.TimeoutError, EOFError) as err:
+                        _LOGGER.debug("Connect failed: %s", err)
+                        self.reconnect.failed(err)
+                        await self.close()
+                        continue
+
+                    self.reconnect.connected()
+
+                try:
+                    data = await self._recv_alive()
+                    if isinstance(data, HeartbeatPing):
+                        await self._send(_heartbeat_ack(data))
+                        continue
+
+                    if isinstance(data, DataMessageStanza):
+                        is_new = self._tracker.received(data.persistent_id)
+                        await self._send_ack()
+
+                except (OSError, asyncio.TimeoutError, EOFError) as err:
+                    _LOGGER.debug("Connection lost: %s, reconnecting", err)
+                    self.reconnect.failed(err)
+                    await self.close()
+                    continue
+
+                if isinstance(data, DataMessageStanza):
+                    if not is_new:
+                        continue
+                    try:
+                        notification = await self._decrypt(data)
+                    except Exception:  # pylint: disable=broad-except
+                        _LOGGER.exception(
+                            "Unable to decrypt data message %s", data.persistent_id
+                        )
+                        continue
+                    yield notification, data
+                elif isinstance(data, Close):
+                    _LOGGER.debug("Server closed connection, reconnecting")
+                    self.reconnect.failed("closed by server")
+                    await self.close()
+                else:
+                    _LOGGER.debug("Unexpected message type %s", type(data))
+
+        finally:
+            await self.close()
+
+    def __aiter__(self) -> AsyncIterator[tuple[Any, DataMessageStanza]]:
+        """Iterate over notifications."""
+        return self.notifications()
+
+
+async def async_listen(
+    credentials: dict[str, Any],
+    callback: Callable[[Any, Any, DataMessageStanza], Awaitable[None] | None],
+    received_persistent_ids: list[str] | None = None,
+    obj: Any = None,
+    persistent_id_store: PersistentIdStore | None = None,
+) -> None:
+    """
+    listens for push notifications on the running event loop
+
+    credentials: credentials object returned by register()
+    callback(obj, notification, data_message): called on notifications,
+                                               may be a coroutine function
+    received_persistent_ids: any persistent id's you already received.
+                             array of strings
+    obj: optional arbitrary value passed to callback
+    persistent_id_store: optional PersistentIdStore used to skip duplicates
+    """
+    async for notification, data_message in AsyncPushReceiver(
+        credentials, received_persistent_ids, persistent_id_store=persistent_id_store
+    ):
+        result = callback(obj, notification, data_message)
+        if asyncio.iscoroutine(result):
+            await result
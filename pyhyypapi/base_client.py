@@ -0,0 +1,94 @@
+"""Shared state of the Hyyp sync and asyncio clients."""
+from __future__ import annotations
+
+from typing import Any, Hashable, Mapping
+
+from .cache import ResponseCache, cache_key
+from .constants import STD_PARAMS, HyypPkg
+from .endpoints import Endpoint
+from .retry import RetryPolicy
+
+
+class HyypBaseClient:
+    """Request parameters, token, retry policy and response cache of a client."""
+
+    def __init__(
+        self,
+        email: str | None = None,
+        password: str | None = None,
+        pkg: str = HyypPkg.ADT_SECURE_HOME.value,
+        token: str | None = None,
+        retry_policy: RetryPolicy | None = None,
+        cache: ResponseCache | None = None,
+        cache_ttls: Mapping[str, float] | None = None,
+    ) -> None:
+        """Initialize shared client state.
+
+        Request parameters and token are kept per client, so several accounts
+        and brands can share one process. A retry policy can be shared between
+        clients to share its budget. Responses are only cached when a cache is
+        passed, cache_ttls overrides the endpoint default lifetimes by name.
+        """
+        self._email = email
+        self._password = password
+        self._params: dict[str, Any] = STD_PARAMS.copy()
+        self._params["pkg"] = pkg
+        self._params["token"] = token
+        self._base_params: dict[str, dict[str, Any]] = {}
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._cache = cache
+        self._cache_ttls: Mapping[str, float] = cache_ttls or {}
+
+    def _set_token(self, token: str | None) -> None:
+        """Store api token and drop precomputed endpoint parameters."""
+        self._params["token"] = token
+        self._base_params.clear()
+
+    def _endpoint_params(self, endpoint: Endpoint, **kwargs: Any) -> dict[str, Any]:
+        """Return request parameters for endpoint."""
+        if endpoint.name not in self._base_params:
+            self._base_params[endpoint.name] = endpoint.base_params(self._params)
+
+        return endpoint.build_params(self._base_params[endpoint.name], kwargs)
+
+    @staticmethod
+    def _flight_key(endpoint: Endpoint, params: Mapping[str, Any]) -> Hashable:
+        """Return key identifying identical requests for coalescing."""
+        return endpoint.name, cache_key(params)
+
+    def _cache_ttl(self, endpoint: Endpoint) -> float | None:
+        """Return response cache lifetime of endpoint, None if not cached."""
+        if self._cache is None:
+            return None
+
+        return self._cache_ttls.get(endpoint.name, endpoint.cache_ttl)
+
+    def _cached_response(
+        self, endpoint: Endpoint, params: Mapping[str, Any]
+    ) -> tuple[Hashable | None, str | None]:
+        """Return cache key and cached response text of a request."""
+        if not self._cache_ttl(endpoint):
+            return None, None
+
+        _key = cache_key(params)
+        return _key, self._cache.get(endpoint.name, _key)  # type: ignore[union-attr]
+
+    def _cache_response(
+        self, endpoint: Endpoint, key: Hashable | None, response_text: str
+    ) -> None:
+        """Store response text of a cacheable request."""
+        _ttl = self._cache_ttl(endpoint)
+        if key is not None and _ttl:
+            self._cache.set(  # type: ignore[union-attr]
+                endpoint.name, key, response_text, _ttl
+            )
+
+    def _invalidate_stale(self, endpoint: Endpoint) -> None:
+        """Drop cached responses made stale by a call to endpoint."""
+        for endpoint_name in endpoint.invalidates:
+            self.invalidate_cache(endpoint_name)
+
+    def invalidate_cache(self, endpoint_name: str | None = None) -> None:
+        """Drop cached responses, all or only those of endpoint_name."""
+        if self._cache is not None:
+            self._cache.invalidate(endpoint_name)
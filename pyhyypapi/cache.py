@@ -0,0 +1,67 @@
+"""Hyyp API response cache."""
+from __future__ import annotations
+
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Hashable, Mapping
+
+DEFAULT_MAX_SIZE = 256
+
+
+def cache_key(params: Mapping[str, Any]) -> Hashable:
+    """Return a hashable key for request parameters."""
+    return tuple(sorted((str(key), repr(value)) for key, value in params.items()))
+
+
+class ResponseCache:
+    """Size bounded LRU cache with per entry expiry.
+
+    Entries are grouped by endpoint name so all responses of an endpoint can
+    be invalidated at once. Any object with the same get/set/invalidate
+    methods can be passed to the clients instead.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """Initialize the cache."""
+        self._max_size = max_size
+        self._entries: OrderedDict[
+            tuple[str, Hashable], tuple[float, Any]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, endpoint_name: str, key: Hashable) -> Any | None:
+        """Return cached value or None when missing or expired."""
+        with self._lock:
+            _entry = self._entries.get((endpoint_name, key))
+            if _entry is None:
+                return None
+
+            if _entry[0] <= time.monotonic():
+                del self._entries[(endpoint_name, key)]
+                return None
+
+            self._entries.move_to_end((endpoint_name, key))
+            return _entry[1]
+
+    def set(self, endpoint_name: str, key: Hashable, value: Any, ttl: float) -> None:
+        """Store value for ttl seconds, evicting the least recently used entry."""
+        with self._lock:
+            self._entries[(endpoint_name, key)] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end((endpoint_name, key))
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, endpoint_name: str | None = None) -> None:
+        """Drop all entries, or only those of endpoint_name."""
+        with self._lock:
+            if endpoint_name is None:
+                self._entries.clear()
+                return
+
+            for _key in [key for key in self._entries if key[0] == endpoint_name]:
+                del self._entries[_key]
+
+    def __len__(self) -> int:
+        """Return number of cached entries."""
+        return len(self._entries)
@@ -2,36 +2,51 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+import time
+from typing import Any, Mapping
 
 import requests
+from urllib3.exceptions import NewConnectionError
 
 from .alarm_info import HyypAlarmInfos
-from .constants import DEFAULT_TIMEOUT, REQUEST_HEADER, STD_PARAMS, HyypPkg
+from .base_client import HyypBaseClient
+from .cache import ResponseCache
+from .coalesce import SingleFlight
+from .constants import DEFAULT_TIMEOUT, REQUEST_HEADER, HyypPkg
+from .endpoints import ENDPOINTS, Endpoint, json_value
 from .exceptions import HTTPError, HyypApiError, InvalidURL
+from .retry import RetryPolicy
 
 _LOGGER = logging.getLogger(__name__)
 
-BASE_URL = "ids.trintel.co.za/Inhep-Impl-1.0-SNAPSHOT/"
-API_ENDPOINT_LOGIN = "/auth/login"
-API_ENDPOINT_CHECK_APP_VERSION = "/auth/checkAppVersion"
-API_ENDPOINT_GET_SITE_NOTIFICATIONS = "/device/getSiteNotifications"
-API_ENDPOINT_SYNC_INFO = "/device/getSyncInfo"
-API_ENDPOINT_STATE_INFO = "/device/getStateInfo"
-API_ENDPOINT_NOTIFICATION_SUBSCRIPTIONS = "/device/getNotificationSubscriptions"
-API_ENDPOINT_GET_USER_PREFERANCES = "/user/getUserPreferences"
-API_ENDPOINT_SET_USER_PREFERANCE = "/user/setUserPreference"
-API_ENDPOINT_SECURITY_COMPANIES = "/security-companies/list"
-API_ENDPOINT_STORE_GCM_REGISTRATION_ID = "/user/storeGcmRegistrationId"
-API_ENDPOINT_ARM_SITE = "/device/armSite"
-API_ENDPOINT_TRIGGER_ALARM = "/device/triggerAlarm"
-API_ENDPOINT_SET_ZONE_BYPASS = "/device/bypass"
-API_ENDPOINT_GET_CAMERA_BY_PARTITION = "/device/getCameraByPartition"
-API_ENDPOINT_UPDATE_SUB_USER = "/user/updateSubUser"
-API_ENDPOINT_SET_NOTIFICATION_SUBSCRIPTIONS = "/user/setNotificationSubscriptionsNew"
-
-
-class HyypClient:
+
+def _request_sent(err: BaseException) -> bool:
+    """Return False if err failed while connecting, before anything was sent.
+
+    requests wraps connection refused and DNS failures in a ConnectionError,
+    the urllib3 NewConnectionError is found in its cause chain.
+    """
+    if isinstance(err, requests.ConnectTimeout):
+        return False
+
+    seen: set[int] = set()
+    errors: list[object] = [err]
+    while errors:
+        error = errors.pop()
+        if not isinstance(error, BaseException) or id(error) in seen:
+            continue
+        if isinstance(error, NewConnectionError):
+            return False
+        seen.add(id(error))
+        errors.extend(
+            (error.__cause__, error.__context__, getattr(error, "reason", None))
+        )
+        errors.extend(error.args)
+
+    return True
+
+
+class HyypClient(HyypBaseClient):
     """Initialize api client object."""
 
     def __init__(
@@ -41,96 +56,122 @@ class HyypClient:
         pkg: str = HyypPkg.ADT_SECURE_HOME.value,
         timeout: int = DEFAULT_TIMEOUT,
         token: str | None = None,
+        session: requests.Session | None = None,
+        retry_policy: RetryPolicy | None = None,
+        cache: ResponseCache | None = None,
+        cache_ttls: Mapping[str, float] | None = None,
     ) -> None:
-        """Initialize the client object."""
-        self._email = email
-        self._password = password
-        self._session = requests.session()
+        """Initialize the client object.
+
+        A requests session can be passed in to pool connections across
+        several clients.
+        """
+        super().__init__(
+            email=email,
+            password=password,
+            pkg=pkg,
+            token=token,
+            retry_policy=retry_policy,
+            cache=cache,
+            cache_ttls=cache_ttls,
+        )
+        self._session = session or requests.session()
         self._session.headers.update(REQUEST_HEADER)
-        STD_PARAMS["pkg"] = pkg
-        STD_PARAMS["token"] = token
+        self._close_session = session is None
         self._timeout = timeout
+        self._single_flight = SingleFlight()
 
-    def login(self) -> Any:
-        """Login to ADT Secure Home API."""
+    def _request(self, endpoint: Endpoint, **kwargs: Any) -> dict[Any, Any]:
+        """Return decoded json of endpoint, from the response cache if fresh.
 
-        _params = STD_PARAMS.copy()
-        _params["email"] = self._email
-        _params["password"] = self._password
+        Identical concurrent read-only requests share one in-flight request.
+        """
+
+        _params = self._endpoint_params(endpoint, **kwargs)
+        _key, _response_text = self._cached_response(endpoint, _params)
+        if _response_text is not None:
+            return endpoint.decode(_response_text)
 
         try:
-            req = self._session.get(
-                "https://" + BASE_URL + API_ENDPOINT_LOGIN,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
+            if endpoint.read_only:
+                _response_text = self._single_flight.do(
+                    self._flight_key(endpoint, _params),
+                    lambda: self._send(endpoint, _params),
+                )
+            else:
+                _response_text = self._send(endpoint, _params)
+            _json_result = endpoint.decode(_response_text)
 
-            req.raise_for_status()
+        finally:
+            self._invalidate_stale(endpoint)
 
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
+        self._cache_response(endpoint, _key, _response_text)
 
-        except requests.HTTPError as err:
-            raise HTTPError from err
+        return _json_result
 
-        try:
-            _json_result: dict[Any, Any] = req.json()
+    def _send(self, endpoint: Endpoint, params: dict[str, Any]) -> str:
+        """Send request to endpoint, retrying per policy, and return response text."""
+
+        attempt = 0
+
+        while True:
+            try:
+                req = self._session.request(
+                    endpoint.method,
+                    endpoint.url,
+                    allow_redirects=False,
+                    params=params,
+                    timeout=self._timeout,
+                )
+
+                req.raise_for_status()
+
+            except (requests.ConnectionError, requests.Timeout) as err:
+                delay = self._retry_policy.retry_delay(
+                    endpoint,
+                    attempt,
+                    request_sent=_request_sent(err),
+                )
+                if delay is None:
+                    raise InvalidURL("A Invalid URL or Proxy error occured") from err
+
+            except requests.HTTPError as err:
+                _response = err.response
+                delay = self._retry_policy.retry_delay(
+                    endpoint,
+                    attempt,
+                    status=_response.status_code if _response is not None else None,
+                    retry_after=(
+                        _response.headers.get("Retry-After")
+                        if _response is not None
+                        else None
+                    ),
+                )
+                if delay is None:
+                    raise HTTPError from err
+
+            else:
+                self._retry_policy.record_success()
+                return req.text
+
+            time.sleep(delay)
+            attempt += 1
 
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
+    def login(self) -> Any:
+        """Login to ADT Secure Home API."""
 
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(f"Login error: {_json_result['error']}")
+        _json_result = self._request(
+            ENDPOINTS["login"], email=self._email, password=self._password
+        )
 
-        STD_PARAMS["token"] = _json_result["token"]
+        self._set_token(_json_result["token"])
 
         return _json_result
 
     def check_app_version(self) -> Any:
         """Check App version via API."""
 
-        _params = STD_PARAMS.copy()
-        _params["clientImei"] = STD_PARAMS["imei"]
-
-        try:
-            req = self._session.get(
-                "https://" + BASE_URL + API_ENDPOINT_CHECK_APP_VERSION,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(
-                f"Error checking app version from api: {_json_result['error']}"
-            )
-
-        return _json_result
+        return self._request(ENDPOINTS["check_app_version"])
 
     def load_alarm_infos(self) -> dict[Any, Any]:
         """Get alarm infos formatted for hass infos."""
@@ -142,41 +183,9 @@ class HyypClient:
     ) -> Any:
         """Get site notifications from API."""
 
-        _params: dict[str, Any] = STD_PARAMS.copy()
-        _params["siteId"] = site_id
-        _params["timestamp"] = timestamp
-
-        try:
-            req = self._session.get(
-                "https://" + BASE_URL + API_ENDPOINT_GET_SITE_NOTIFICATIONS,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(
-                f"Error getting site notifications from api: {_json_result['error']}"
-            )
+        _json_result = self._request(
+            ENDPOINTS["site_notifications"], site_id=site_id, timestamp=timestamp
+        )
 
         if json_key is None or not _json_result["listSiteNotifications"][str(site_id)]:
             return _json_result["listSiteNotifications"][str(site_id)]
@@ -193,347 +202,65 @@ class HyypClient:
     ) -> Any:
         """Enable or disable app notifications."""
 
-        _params: dict[str, Any] = STD_PARAMS.copy()
-        del _params["imei"]
-        _params["mobileImei"] = STD_PARAMS["imei"]
-        _params["troubleNotifications"] = trouble_notifications
-        _params["emergencyNotifications"] = emergency_notifications
-        _params["userNotifications"] = user_notifications
-        _params["informationNotifications"] = information_notifications
-        _params["testReportNotifications"] = test_report_notifications
-
-        try:
-            req = self._session.post(
-                "https://" + BASE_URL + API_ENDPOINT_SET_NOTIFICATION_SUBSCRIPTIONS,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(
-                f"Error getting site notifications from api: {_json_result['error']}"
-            )
-
-        return _json_result
+        return self._request(
+            ENDPOINTS["set_notification_subscriptions"],
+            trouble_notifications=trouble_notifications,
+            emergency_notifications=emergency_notifications,
+            user_notifications=user_notifications,
+            information_notifications=information_notifications,
+            test_report_notifications=test_report_notifications,
+        )
 
     def get_camera_by_partition(
         self, partition_id: int, json_key: str | None = None
     ) -> Any:
         """Get cameras, bypassed zones and zone ids by partition from API."""
 
-        _params: dict[str, Any] = STD_PARAMS.copy()
-        _params["partitionId"] = partition_id
-
-        try:
-            req = self._session.get(
-                "https://" + BASE_URL + API_ENDPOINT_GET_CAMERA_BY_PARTITION,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(
-                f"Error getting partition cameras from api: {_json_result['error']}"
-            )
-
-        if json_key is None:
-            return _json_result
-
-        return _json_result[json_key]
+        return json_value(
+            self._request(
+                ENDPOINTS["get_camera_by_partition"], partition_id=partition_id
+            ),
+            json_key,
+        )
 
     def get_sync_info(self, json_key: str | None = None) -> Any:
         """Get user, site, partition and users info from API."""
 
-        _params = STD_PARAMS
-
-        try:
-            req = self._session.get(
-                "https://" + BASE_URL + API_ENDPOINT_SYNC_INFO,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(
-                f"Error getting sync info from api: {_json_result['error']}"
-            )
-
-        if json_key is None:
-            return _json_result
-
-        return _json_result[json_key]
+        return json_value(self._request(ENDPOINTS["get_sync_info"]), json_key)
 
     def get_state_info(self, json_key: str | None = None) -> Any:
         """Get state info from API. Returns armed, bypassed partition ids."""
 
-        _params = STD_PARAMS
-
-        try:
-            req = self._session.get(
-                "https://" + BASE_URL + API_ENDPOINT_STATE_INFO,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(
-                f"Error getting state info from api: {_json_result['error']}"
-            )
-
-        if json_key is None:
-            return _json_result
-
-        return _json_result[json_key]
+        return json_value(self._request(ENDPOINTS["get_state_info"]), json_key)
 
     def get_notification_subscriptions(self, json_key: str | None = None) -> Any:
         """Get notification subscriptions from API."""
 
-        _params = STD_PARAMS
-
-        try:
-            req = self._session.get(
-                "https://" + BASE_URL + API_ENDPOINT_NOTIFICATION_SUBSCRIPTIONS,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(
-                f"Error getting notification subscriptions: {_json_result['error']}"
-            )
-
-        if json_key is None:
-            return _json_result
-
-        return _json_result[json_key]
+        return json_value(
+            self._request(ENDPOINTS["get_notification_subscriptions"]), json_key
+        )
 
     def get_user_preferences(
         self, user_id: int, site_id: int | None = None, json_key: str | None = None
     ) -> Any:
         """Get user preferences from API."""
 
-        _params: dict[str, Any] = STD_PARAMS.copy()
-        _params["userId"] = user_id
-        _params["siteId"] = site_id
-
-        try:
-            req = self._session.get(
-                "https://" + BASE_URL + API_ENDPOINT_GET_USER_PREFERANCES,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(
-                f"Error getting user preferences: {_json_result['error']}"
-            )
-
-        if json_key is None:
-            return _json_result
-
-        return _json_result[json_key]
+        return json_value(
+            self._request(
+                ENDPOINTS["get_user_preferences"], user_id=user_id, site_id=site_id
+            ),
+            json_key,
+        )
 
     def get_security_companies(self, json_key: str | None = None) -> Any:
         """Get security companies from API."""
 
-        _params = STD_PARAMS
-
-        try:
-            req = self._session.get(
-                "https://" + BASE_URL + API_ENDPOINT_SECURITY_COMPANIES,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(
-                f"Failed to get security companies: {_json_result['error']}"
-            )
-
-        if json_key is None:
-            return _json_result
-
-        return _json_result[json_key]
+        return json_value(self._request(ENDPOINTS["get_security_companies"]), json_key)
 
     def store_gcm_registrationid(self, gcm_id: str | None = None) -> Any:
         """Store gcmid."""
 
-        _params = STD_PARAMS.copy()
-        _params["gcmId"] = gcm_id
-        del _params["imei"]
-        _params["clientImei"] = STD_PARAMS["imei"]
-
-        try:
-            req = self._session.post(
-                "https://" + BASE_URL + API_ENDPOINT_STORE_GCM_REGISTRATION_ID,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(f"Storing gcm id failed with: {_json_result['error']}")
-
-        return _json_result
+        return self._request(ENDPOINTS["store_gcm_registrationid"], gcm_id=gcm_id)
 
     def set_user_preference(
         self,
@@ -547,48 +274,16 @@ class HyypClient:
         if store_for not in ["Arm", "Bypass"]:
             raise HyypApiError("Invalid selection, choose between Arm or Bypass")
 
-        _params: dict[Any, Any] = STD_PARAMS.copy()
-        _params["siteId"] = site_id
-
-        _params["name"] = (
+        _name = (
             "site." + site_id + ".partition." + partition_id + ".storeFor" + store_for
         )
 
-        _params["preference_value"] = new_code
-
-        try:
-            req = self._session.post(
-                "https://" + BASE_URL + API_ENDPOINT_SET_USER_PREFERANCE,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(
-                f"Set user preferance failed with: {_json_result['error']}"
-            )
-
-        return _json_result
+        return self._request(
+            ENDPOINTS["set_user_preference"],
+            site_id=site_id,
+            name=_name,
+            preference_value=new_code,
+        )
 
     def set_subuser_preference(
         self,
@@ -600,50 +295,13 @@ class HyypClient:
     ) -> Any:
         """Set sub user preferences."""
 
-        _params: dict[Any, Any] = STD_PARAMS.copy()
-        _params["siteId"] = site_id
-        _params["userId"] = user_id
-
-        _params["partitions"] = {}
-        _params["partitions"][0] = {}
-        _params["partitions"][0][".id"] = partition_id
-        _params["partitions"][0][".pin"] = partition_pin
-        _params["stayProfileIds"] = {}
-        _params["stayProfileIds"][0] = stay_profile_id
-
-        try:
-            req = self._session.post(
-                "https://" + BASE_URL + API_ENDPOINT_UPDATE_SUB_USER,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(
-                f"Updating sub user failed with: {_json_result['error']}"
-            )
-
-        return _json_result
+        return self._request(
+            ENDPOINTS["set_subuser_preference"],
+            site_id=site_id,
+            user_id=user_id,
+            partitions={0: {".id": partition_id, ".pin": partition_pin}},
+            stayProfileIds={0: stay_profile_id},
+        )
 
     def arm_site(
         self,
@@ -655,46 +313,14 @@ class HyypClient:
     ) -> Any:
         """Arm alarm or stay profile via API."""
 
-        _params: dict[Any, Any] = STD_PARAMS.copy()
-        _params["arm"] = arm
-        _params["pin"] = pin
-        _params["partitionId"] = partition_id
-        _params["siteId"] = site_id
-        _params["stayProfileId"] = stay_profile_id
-        del _params["imei"]
-        _params["clientImei"] = STD_PARAMS["imei"]
-
-        try:
-            req = self._session.get(
-                "https://" + BASE_URL + API_ENDPOINT_ARM_SITE,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(f"Arm site failed: {_json_result['error']}")
-
-        return _json_result
+        return self._request(
+            ENDPOINTS["arm_site"],
+            arm=arm,
+            pin=pin,
+            partition_id=partition_id,
+            site_id=site_id,
+            stay_profile_id=stay_profile_id,
+        )
 
     # Untested.
     def trigger_alarm(
@@ -706,45 +332,13 @@ class HyypClient:
     ) -> Any:
         """Trigger Alarm via API."""
 
-        _params: dict[Any, Any] = STD_PARAMS.copy()
-        _params["pin"] = pin
-        _params["partitionId"] = partition_id
-        _params["siteId"] = site_id
-        _params["triggerId"] = trigger_id
-        del _params["imei"]
-        _params["clientImei"] = STD_PARAMS["imei"]
-
-        try:
-            req = self._session.post(
-                "https://" + BASE_URL + API_ENDPOINT_TRIGGER_ALARM,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(f"Trigger alarm failed: {_json_result['error']}")
-
-        return _json_result
+        return self._request(
+            ENDPOINTS["trigger_alarm"],
+            pin=pin,
+            partition_id=partition_id,
+            site_id=site_id,
+            trigger_id=trigger_id,
+        )
 
     def set_zone_bypass(
         self,
@@ -755,54 +349,23 @@ class HyypClient:
     ) -> Any:
         """Set/toggle zone bypass."""
 
-        _params: dict[str, Any] = STD_PARAMS.copy()
-        _params["partitionId"] = partition_id
-        _params["zones"] = zones
-        _params["stayProfileId"] = stay_profile_id
-        _params["pin"] = pin
-        del _params["imei"]
-        _params["clientImei"] = STD_PARAMS["imei"]
-
-        try:
-            req = self._session.get(
-                "https://" + BASE_URL + API_ENDPOINT_SET_ZONE_BYPASS,
-                allow_redirects=False,
-                params=_params,
-                timeout=self._timeout,
-            )
-
-            req.raise_for_status()
-
-        except requests.ConnectionError as err:
-            raise InvalidURL("A Invalid URL or Proxy error occured") from err
-
-        except requests.HTTPError as err:
-            raise HTTPError from err
-
-        try:
-            _json_result: dict[Any, Any] = req.json()
-
-        except ValueError as err:
-            raise HyypApiError(
-                "Impossible to decode response: "
-                + str(err)
-                + "\nResponse was: "
-                + str(req.text)
-            ) from err
-
-        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
-            raise HyypApiError(f"Failed to set zone bypass: {_json_result['error']}")
-
-        return _json_result
+        return self._request(
+            ENDPOINTS["set_zone_bypass"],
+            partition_id=partition_id,
+            zones=zones,
+            stay_profile_id=stay_profile_id,
+            pin=pin,
+        )
 
     def logout(self) -> None:
         """Close ADT Secure Home session."""
         self.close_session()
 
     def close_session(self) -> None:
-        """Clear current session."""
-        if self._session:
+        """Clear current session, closing it if this client owns it."""
+        if self._session and self._close_session:
             self._session.close()
 
         self._session = requests.session()
         self._session.headers.update(REQUEST_HEADER)  # Reset session.
+        self._close_session = True
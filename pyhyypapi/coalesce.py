@@ -0,0 +1,59 @@
+"""Single-flight coalescing of identical concurrent requests."""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Future
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """Share one call between threads requesting the same key concurrently."""
+
+    def __init__(self) -> None:
+        """Initialize in-flight call registry."""
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Return func(), or the result of the identical call already running."""
+        with self._lock:
+            _call = self._calls.get(key)
+            _leader = _call is None
+            if _call is None:
+                _call = self._calls[key] = Future()
+
+        if not _leader:
+            return _call.result()
+
+        try:
+            _call.set_result(func())
+
+        except BaseException as err:  # pylint: disable=broad-except
+            _call.set_exception(err)
+
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        return _call.result()
+
+
+class AsyncSingleFlight:
+    """Share one coroutine between tasks requesting the same key concurrently."""
+
+    def __init__(self) -> None:
+        """Initialize in-flight call registry."""
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await func(), or the result of the identical call already running.
+
+        Waiters are shielded, cancelling one does not cancel the shared call.
+        """
+        _call = self._calls.get(key)
+        if _call is None:
+            _call = self._calls[key] = asyncio.ensure_future(func())
+            _call.add_done_callback(lambda _: self._calls.pop(key, None))
+
+        return await asyncio.shield(_call)
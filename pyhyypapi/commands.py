@@ -0,0 +1,520 @@
+"""Confirm alarm commands from push RPC results and state changes."""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Future
+from dataclasses import dataclass
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict
+
+from .constants import EventNumber, RpcCodes
+from .dispatch import (
+    notification_event_number,
+    notification_rpc_code,
+    notification_site_id,
+)
+from .exceptions import HyypApiError, HyypCommandError
+from .push_bridge import STATE_EVENTS
+
+if TYPE_CHECKING:
+    from .async_client import AsyncHyypClient
+    from .client import HyypClient
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CONFIRM_TIMEOUT = 30
+DEFAULT_POLL_INTERVAL = 5
+DEFAULT_MAX_POLLS = 3
+
+StatePredicate = Callable[[Dict[Any, Any]], bool]
+
+
+@dataclass
+class CommandResult:
+    """Confirmation of a command.
+
+    source: "push" if confirmed after a push notification, "poll" if by the
+    timeout fallback, "state" if by state info passed to check_state.
+    "unchanged" if the state already matched before sending and neither an
+    RPC result nor an error arrived in time.
+    """
+
+    command: str
+    site_id: str
+    source: str
+    state_info: dict[Any, Any]
+
+
+@dataclass
+class _PendingCommand:
+    """Command waiting for its confirmation."""
+
+    command: str
+    site_id: str
+    predicate: StatePredicate
+    future: Any
+    state_before: dict[Any, Any]
+    unchanged: bool = False
+    polls: int = 0
+    timer: Any = None
+    task: Any = None
+
+
+def _site_of(
+    sync_info: dict[Any, Any], partition_id: Any = None, zone: Any = None
+) -> Any:
+    """Return the site of a partition, or of the partition holding zone."""
+    if partition_id is None:
+        for partition in sync_info["partitions"]:
+            if zone in partition["zoneIds"]:
+                partition_id = partition["id"]
+                break
+
+    for site in sync_info["sites"]:
+        if partition_id in site["partitionIds"]:
+            return site["id"]
+
+    raise ValueError(f"Unknown partition {partition_id} or zone {zone}")
+
+
+def _site_partitions(sync_info: dict[Any, Any], site_id: Any) -> list[Any]:
+    """Return partition ids of a site."""
+    for site in sync_info["sites"]:
+        if str(site["id"]) == str(site_id):
+            return list(site["partitionIds"])
+
+    raise ValueError(f"Unknown site {site_id}")
+
+
+def arm_predicate(
+    arm: bool, partition_ids: list[Any], stay_profile_id: Any = None
+) -> StatePredicate:
+    """Return a check of state info for an arm_site command."""
+
+    def predicate(state_info: dict[Any, Any]) -> bool:
+        if stay_profile_id:
+            armed_stay = set(state_info.get("armedStayProfileIds") or ())
+            return (stay_profile_id in armed_stay) == arm
+
+        armed = set(state_info.get("armedPartitionIds") or ())
+        return all((partition_id in armed) == arm for partition_id in partition_ids)
+
+    return predicate
+
+
+def bypass_predicate(zone: Any, bypassed: bool) -> StatePredicate:
+    """Return a check of state info for a set_zone_bypass command."""
+
+    def predicate(state_info: dict[Any, Any]) -> bool:
+        return (zone in set(state_info.get("bypassedZoneIds") or ())) == bypassed
+
+    return predicate
+
+
+class _CommandTracker:
+    """Pending commands and their resolution, shared by both trackers."""
+
+    def __init__(
+        self,
+        client: Any,
+        timeout: float,
+        poll_interval: float,
+        max_polls: int,
+    ) -> None:
+        """Initialize the tracker."""
+        self._client = client
+        self._timeout = timeout
+        self._poll_interval = poll_interval
+        self._max_polls = max_polls
+        self._pending: list[_PendingCommand] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return number of unconfirmed commands."""
+        return len(self._pending)
+
+    def _register(self, pending: _PendingCommand) -> None:
+        """Start waiting for the confirmation of a command."""
+        with self._lock:
+            self._pending.append(pending)
+
+    def _discard(self, pending: _PendingCommand) -> None:
+        """Stop waiting for a command that could not be sent."""
+        with self._lock:
+            self._pending.remove(pending)
+        pending.future.cancel()
+
+    def _resolve(
+        self,
+        pending: _PendingCommand,
+        result: CommandResult | None = None,
+        error: BaseException | None = None,
+    ) -> None:
+        """Resolve the future of a command."""
+        with self._lock:
+            if pending in self._pending:
+                self._pending.remove(pending)
+        if pending.timer is not None:
+            pending.timer.cancel()
+        if pending.future.done():
+            return
+        if error is not None:
+            pending.future.set_exception(error)
+        else:
+            pending.future.set_result(result)
+
+    def _for_site(self, site_id: str | None) -> list[_PendingCommand]:
+        """Return pending commands of site_id, oldest first, all if None."""
+        with self._lock:
+            return [
+                pending
+                for pending in self._pending
+                if site_id is None or pending.site_id == site_id
+            ]
+
+    def _pending_command(
+        self, pending: _PendingCommand, state_before: dict[Any, Any]
+    ) -> _PendingCommand:
+        """Register a command, state can't confirm it if it already matches."""
+        pending.unchanged = pending.predicate(state_before)
+        self._register(pending)
+        return pending
+
+    def _on_push(self, notification: Any) -> bool:
+        """Resolve commands on RPC results, return True if state must be checked.
+
+        An RPC result applies to the oldest command of the notified site. A
+        result naming no site is only applied when a single command waits.
+        """
+        site_id = notification_site_id(notification)
+        pending = self._for_site(site_id)
+        if not pending:
+            return False
+
+        rpc_code = notification_rpc_code(notification)
+        if rpc_code is not None:
+            if site_id is None and len(pending) > 1:
+                _LOGGER.debug("Ignoring RPC result %s naming no site", rpc_code)
+                return False
+
+            command = pending[0]
+            if rpc_code in RpcCodes:
+                _LOGGER.debug("Command %s failed with %s", command.command, rpc_code)
+                self._resolve(
+                    command, error=HyypCommandError(rpc_code, RpcCodes[rpc_code])
+                )
+                return False
+
+            if command.unchanged:
+                self._resolve(
+                    command,
+                    CommandResult(
+                        command.command, command.site_id, "push", command.state_before
+                    ),
+                )
+                return False
+
+            return True
+
+        event_number = notification_event_number(notification)
+        return event_number not in EventNumber or event_number in STATE_EVENTS
+
+    def check_state(self, state_info: dict[Any, Any], source: str = "state") -> None:
+        """Confirm the pending commands state_info shows as executed."""
+        for pending in self._for_site(None):
+            if not pending.unchanged and pending.predicate(state_info):
+                self._resolve(
+                    pending,
+                    CommandResult(
+                        pending.command, pending.site_id, source, state_info
+                    ),
+                )
+
+    def _polled(self, pending: _PendingCommand) -> bool:
+        """Count a fallback poll, fail the command after max_polls."""
+        if pending.future.done():
+            return False
+
+        pending.polls += 1
+        if pending.polls < self._max_polls:
+            return True
+
+        if pending.unchanged:
+            self._resolve(
+                pending,
+                CommandResult(
+                    pending.command, pending.site_id, "unchanged", pending.state_before
+                ),
+            )
+        else:
+            self._resolve(
+                pending,
+                error=TimeoutError(f"{pending.command} of {pending.site_id}"),
+            )
+        return False
+
+
+class HyypCommandTracker(_CommandTracker):
+    """Send commands with a HyypClient and return futures of their outcome.
+
+    A future resolves with a CommandResult once the expected state shows in
+    state info, which is fetched after push notifications of the command's
+    site, see handle. A push RPC error code from constants.RpcCodes fails
+    the site's oldest command with HyypCommandError. Without a push within
+    timeout seconds, state info is polled every poll_interval seconds and
+    the future fails with TimeoutError after max_polls polls.
+    """
+
+    def __init__(
+        self,
+        client: HyypClient,
+        timeout: float = DEFAULT_CONFIRM_TIMEOUT,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        max_polls: int = DEFAULT_MAX_POLLS,
+    ) -> None:
+        """Initialize the tracker."""
+        super().__init__(client, timeout, poll_interval, max_polls)
+
+    def _state_info(self) -> dict[Any, Any]:
+        """Return fresh state info."""
+        self._client.invalidate_cache("get_state_info")
+        return self._client.get_state_info()
+
+    def _schedule(self, pending: _PendingCommand, delay: float) -> None:
+        """Poll state info for a command after delay seconds."""
+        pending.timer = threading.Timer(delay, self._poll, (pending,))
+        pending.timer.daemon = True
+        pending.timer.start()
+
+    def _poll(self, pending: _PendingCommand) -> None:
+        """Check state info for a command not confirmed by a push."""
+        if pending.future.done():
+            return
+
+        try:
+            self.check_state(self._state_info(), "poll")
+        except HyypApiError as err:
+            _LOGGER.debug("Error polling state of %s: %s", pending.command, err)
+
+        if self._polled(pending):
+            self._schedule(pending, self._poll_interval)
+
+    def _send(
+        self,
+        command: str,
+        site_id: Any,
+        predicate: StatePredicate,
+        params: dict[str, Any],
+        state_before: dict[Any, Any],
+    ) -> Future:
+        """Send a command and return the future of its confirmation."""
+        pending = self._pending_command(
+            _PendingCommand(command, str(site_id), predicate, Future(), state_before),
+            state_before,
+        )
+        try:
+            getattr(self._client, command)(**params)
+        except BaseException:
+            self._discard(pending)
+            raise
+
+        self._schedule(pending, self._timeout)
+        return pending.future
+
+    def arm_site(
+        self,
+        site_id: int,
+        arm: bool = True,
+        pin: int | None = None,
+        partition_id: int | None = None,
+        stay_profile_id: int | None = None,
+    ) -> Future:
+        """Arm or disarm a site, return a future of the confirmation."""
+        partition_ids = [partition_id]
+        if partition_id is None and not stay_profile_id:
+            partition_ids = _site_partitions(self._client.get_sync_info(), site_id)
+        state_before = self._state_info()
+
+        return self._send(
+            "arm_site",
+            site_id,
+            arm_predicate(arm, partition_ids, stay_profile_id),
+            {
+                "site_id": site_id,
+                "arm": arm,
+                "pin": pin,
+                "partition_id": partition_id,
+                "stay_profile_id": stay_profile_id,
+            },
+            state_before,
+        )
+
+    def set_zone_bypass(
+        self,
+        zones: int,
+        partition_id: int | None = None,
+        stay_profile_id: int = 0,
+        pin: int | None = None,
+    ) -> Future:
+        """Toggle the bypass of a zone, return a future of the confirmation."""
+        site_id = _site_of(self._client.get_sync_info(), partition_id, zones)
+        state_before = self._state_info()
+        bypassed = zones not in set(state_before.get("bypassedZoneIds") or ())
+
+        return self._send(
+            "set_zone_bypass",
+            site_id,
+            bypass_predicate(zones, bypassed),
+            {
+                "zones": zones,
+                "partition_id": partition_id,
+                "stay_profile_id": stay_profile_id,
+                "pin": pin,
+            },
+            state_before,
+        )
+
+    def handle(self, obj: Any, notification: Any, data_message: Any = None) -> None:
+        """Resolve commands from a push notification.
+
+        Fetches state info, wrap it in a NotificationDispatcher before
+        passing it to listen() to keep the request off the socket thread.
+        """
+        if not self._on_push(notification):
+            return
+
+        try:
+            self.check_state(self._state_info(), "push")
+        except HyypApiError as err:
+            _LOGGER.debug("Error checking state after push: %s", err)
+
+
+class AsyncHyypCommandTracker(_CommandTracker):
+    """HyypCommandTracker for an AsyncHyypClient, returns asyncio futures."""
+
+    def __init__(
+        self,
+        client: AsyncHyypClient,
+        timeout: float = DEFAULT_CONFIRM_TIMEOUT,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        max_polls: int = DEFAULT_MAX_POLLS,
+    ) -> None:
+        """Initialize the tracker."""
+        super().__init__(client, timeout, poll_interval, max_polls)
+
+    async def _state_info(self) -> dict[Any, Any]:
+        """Return fresh state info."""
+        self._client.invalidate_cache("get_state_info")
+        return await self._client.get_state_info()
+
+    def _schedule(self, pending: _PendingCommand, delay: float) -> None:
+        """Poll state info for a command after delay seconds."""
+
+        def start_poll() -> None:
+            pending.task = asyncio.ensure_future(self._poll(pending))
+
+        pending.timer = asyncio.get_running_loop().call_later(delay, start_poll)
+
+    async def _poll(self, pending: _PendingCommand) -> None:
+        """Check state info for a command not confirmed by a push."""
+        if pending.future.done():
+            return
+
+        try:
+            self.check_state(await self._state_info(), "poll")
+        except HyypApiError as err:
+            _LOGGER.debug("Error polling state of %s: %s", pending.command, err)
+
+        if self._polled(pending):
+            self._schedule(pending, self._poll_interval)
+
+    async def _send(
+        self,
+        command: str,
+        site_id: Any,
+        predicate: StatePredicate,
+        params: dict[str, Any],
+        state_before: dict[Any, Any],
+    ) -> asyncio.Future:
+        """Send a command and return the future of its confirmation."""
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending_command(
+            _PendingCommand(command, str(site_id), predicate, future, state_before),
+            state_before,
+        )
+        try:
+            await getattr(self._client, command)(**params)
+        except BaseException:
+            self._discard(pending)
+            raise
+
+        self._schedule(pending, self._timeout)
+        return future
+
+    async def arm_site(
+        self,
+        site_id: int,
+        arm: bool = True,
+        pin: int | None = None,
+        partition_id: int | None = None,
+        stay_profile_id: int | None = None,
+    ) -> asyncio.Future:
+        """Arm or disarm a site, return a future of the confirmation."""
+        partition_ids = [partition_id]
+        if partition_id is None and not stay_profile_id:
+            partition_ids = _site_partitions(
+                await self._client.get_sync_info(), site_id
+            )
+        state_before = await self._state_info()
+
+        return await self._send(
+            "arm_site",
+            site_id,
+            arm_predicate(arm, partition_ids, stay_profile_id),
+            {
+                "site_id": site_id,
+                "arm": arm,
+                "pin": pin,
+                "partition_id": partition_id,
+                "stay_profile_id": stay_profile_id,
+            },
+            state_before,
+        )
+
+    async def set_zone_bypass(
+        self,
+        zones: int,
+        partition_id: int | None = None,
+        stay_profile_id: int = 0,
+        pin: int | None = None,
+    ) -> asyncio.Future:
+        """Toggle the bypass of a zone, return a future of the confirmation."""
+        site_id = _site_of(await self._client.get_sync_info(), partition_id, zones)
+        state_before = await self._state_info()
+        bypassed = zones not in set(state_before.get("bypassedZoneIds") or ())
+
+        return await self._send(
+            "set_zone_bypass",
+            site_id,
+            bypass_predicate(zones, bypassed),
+            {
+                "zones": zones,
+                "partition_id": partition_id,
+                "stay_profile_id": stay_profile_id,
+                "pin": pin,
+            },
+            state_before,
+        )
+
+    async def async_handle(
+        self, obj: Any, notification: Any, data_message: Any = None
+    ) -> None:
+        """Resolve commands from a push notification."""
+        if not self._on_push(notification):
+            return
+
+        try:
+            self.check_state(await self._state_info(), "push")
+        except HyypApiError as err:
+            _LOGGER.debug("Error checking state after push: %s", err)
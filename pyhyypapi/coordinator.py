@@ -0,0 +1,340 @@
+"""Split-rate polling coordinator for Hyyp alarm status."""
+from __future__ import annotations
+
+import inspect
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterable, cast
+
+from .alarm_info import DEFAULT_MAX_WORKERS, HyypAlarmInfos, HyypEntityChange
+from .exceptions import HyypApiError
+
+if TYPE_CHECKING:
+    from .async_client import AsyncHyypClient
+    from .client import HyypClient
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_STATE_INTERVAL = 10
+DEFAULT_NOTICE_INTERVAL = 5 * 60
+DEFAULT_SYNC_INTERVAL = 60 * 60
+
+STATE_KEYS = ("armedPartitionIds", "armedStayProfileIds", "bypassedZoneIds")
+
+
+class HyypDataCoordinator:
+    """Refresh each Hyyp data source on its own schedule.
+
+    State info is polled every state_interval seconds, site topology (sync
+    info) every sync_interval seconds and last notices every notice_interval
+    seconds or as soon as the state of a site changes. Listeners are called
+    with the merged status snapshot whenever it changes, the changed entities
+    are available in changes.
+    """
+
+    def __init__(
+        self,
+        client: HyypClient | AsyncHyypClient,
+        state_interval: float = DEFAULT_STATE_INTERVAL,
+        notice_interval: float = DEFAULT_NOTICE_INTERVAL,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> None:
+        """Initialize the coordinator."""
+        self._client = client
+        self._alarm_infos = HyypAlarmInfos(client, max_workers=max_workers)
+        self._intervals = {
+            "state": state_interval,
+            "notice": notice_interval,
+            "sync": sync_interval,
+        }
+        self._last_refresh: dict[str, float] = {}
+        self._sync_info: dict[Any, Any] = {}
+        self._state_info: dict[Any, Any] = {}
+        self._last_notices: dict[Any, dict[Any, Any]] = {}
+        self._listeners: list[Callable[[dict[Any, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.data: dict[Any, Any] = {}
+        self.changes: list[HyypEntityChange] = []
+
+    def add_listener(
+        self, update_callback: Callable[[dict[Any, Any]], None]
+    ) -> Callable[[], None]:
+        """Listen for status changes, returns a callable removing the listener."""
+        self._listeners.append(update_callback)
+
+        def remove_listener() -> None:
+            if update_callback in self._listeners:
+                self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    def _sync_client(self) -> HyypClient:
+        """Return the client of the blocking methods, raise on an async one."""
+        if inspect.iscoroutinefunction(self._client.get_state_info):
+            raise TypeError("Use the async_ methods with an AsyncHyypClient")
+        return cast("HyypClient", self._client)
+
+    def _async_client(self) -> AsyncHyypClient:
+        """Return the client of the async_ methods, raise on a blocking one."""
+        if not inspect.iscoroutinefunction(self._client.get_state_info):
+            raise TypeError("Use the blocking methods with a HyypClient")
+        return cast("AsyncHyypClient", self._client)
+
+    def _due(self, source: str, now: float) -> bool:
+        """Return True if source should be refreshed."""
+        _last = self._last_refresh.get(source)
+        return _last is None or now - _last >= self._intervals[source]
+
+    def next_refresh_in(self) -> float:
+        """Return seconds until the next source is due."""
+        now = time.monotonic()
+        return max(
+            0.0,
+            min(
+                self._last_refresh.get(source, now) + interval - now
+                for source, interval in self._intervals.items()
+            ),
+        )
+
+    def _changed_sites(self, state_info: dict[Any, Any]) -> set[Any]:
+        """Return ids of sites whose partitions, stay profiles or zones changed."""
+        changed_ids: set[Any] = set()
+        for key in STATE_KEYS:
+            changed_ids |= set(self._state_info.get(key) or ()) ^ set(
+                state_info.get(key) or ()
+            )
+
+        if not changed_ids:
+            return set()
+
+        _partitions = {
+            partition["id"]: partition for partition in self._sync_info["partitions"]
+        }
+        changed_sites: set[Any] = set()
+
+        for site in self._sync_info["sites"]:
+            for partition_id in site["partitionIds"]:
+                _partition = _partitions[partition_id]
+                if (
+                    partition_id in changed_ids
+                    or not changed_ids.isdisjoint(_partition["stayProfileIds"])
+                    or not changed_ids.isdisjoint(_partition["zoneIds"])
+                ):
+                    changed_sites.add(site["id"])
+                    break
+
+        return changed_sites
+
+    def _plan(
+        self, state_info: dict[Any, Any] | None, force: bool, now: float
+    ) -> Iterable[Any]:
+        """Return site ids needing a last notice refresh."""
+        site_ids = [site["id"] for site in self._sync_info.get("sites", ())]
+
+        if force or self._due("notice", now):
+            self._last_refresh["notice"] = now
+            return site_ids
+
+        _stale = {site_id for site_id in site_ids if site_id not in self._last_notices}
+        if state_info is not None:
+            _stale |= self._changed_sites(state_info)
+
+        return [site_id for site_id in site_ids if site_id in _stale]
+
+    def _site_targets(
+        self, site_ids: Iterable[Any] | None, state_info: dict[Any, Any] | None
+    ) -> list[Any]:
+        """Return known site ids matching site_ids or missing a notice.
+
+        Sites whose state changed are included as well.
+        """
+        known_ids = [site["id"] for site in self._sync_info.get("sites", ())]
+        if site_ids is None:
+            return known_ids
+
+        _wanted = {str(site_id) for site_id in site_ids}
+        _targets = {
+            site_id
+            for site_id in known_ids
+            if str(site_id) in _wanted or site_id not in self._last_notices
+        }
+        if state_info is not None:
+            _targets |= self._changed_sites(state_info)
+
+        return [site_id for site_id in known_ids if site_id in _targets]
+
+    def _invalidate_site_data(self, state: bool) -> None:
+        """Drop cached state info and notices the refresh must not reuse."""
+        if state:
+            self._client.invalidate_cache("get_state_info")
+        self._client.invalidate_cache("site_notifications")
+
+    def _merge(self) -> dict[Any, Any]:
+        """Merge sources into a status snapshot and notify listeners on change."""
+        self.data, self.changes = self._alarm_infos.format_status_changes(
+            self._sync_info, self._state_info, self._last_notices
+        )
+
+        if self.changes:
+            for update_callback in list(self._listeners):
+                try:
+                    update_callback(self.data)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Error in Hyyp data listener")
+
+        return self.data
+
+    def refresh(self, force: bool = False) -> dict[Any, Any]:
+        """Refresh due sources using a HyypClient and return the snapshot."""
+        client = self._sync_client()
+        with self._lock:
+            now = time.monotonic()
+
+            if force or self._due("sync", now):
+                self._sync_info = client.get_sync_info()
+                self._last_refresh["sync"] = now
+
+            _state_info = None
+            if force or self._due("state", now):
+                _state_info = client.get_state_info()
+                self._last_refresh["state"] = now
+
+            self._last_notices.update(
+                self._alarm_infos.last_notices(
+                    list(self._plan(_state_info, force, now))
+                )
+            )
+
+            if _state_info is not None:
+                self._state_info = _state_info
+
+            return self._merge()
+
+    async def async_refresh(self, force: bool = False) -> dict[Any, Any]:
+        """Refresh due sources using an AsyncHyypClient and return the snapshot."""
+        client = self._async_client()
+        now = time.monotonic()
+
+        if force or self._due("sync", now):
+            self._sync_info = await client.get_sync_info()
+            self._last_refresh["sync"] = now
+
+        _state_info = None
+        if force or self._due("state", now):
+            _state_info = await client.get_state_info()
+            self._last_refresh["state"] = now
+
+        self._last_notices.update(
+            await self._alarm_infos.async_last_notices(
+                list(self._plan(_state_info, force, now))
+            )
+        )
+
+        if _state_info is not None:
+            self._state_info = _state_info
+
+        return self._merge()
+
+    def refresh_sites(
+        self, site_ids: Iterable[Any] | None = None, state: bool = True
+    ) -> dict[Any, Any]:
+        """Refresh the last notice of site_ids now using a HyypClient.
+
+        Meant for push notifications. state also refreshes state info, and
+        then the last notice of every site whose state changed. site_ids None
+        refreshes the last notices of all sites.
+        """
+        client = self._sync_client()
+        with self._lock:
+            now = time.monotonic()
+
+            if not self._sync_info:
+                self._sync_info = client.get_sync_info()
+                self._last_refresh["sync"] = now
+
+            state = state or not self._state_info
+            self._invalidate_site_data(state)
+            _state_info = None
+            if state:
+                _state_info = client.get_state_info()
+                self._last_refresh["state"] = now
+
+            self._last_notices.update(
+                self._alarm_infos.last_notices(
+                    self._site_targets(site_ids, _state_info)
+                )
+            )
+
+            if _state_info is not None:
+                self._state_info = _state_info
+
+            return self._merge()
+
+    async def async_refresh_sites(
+        self, site_ids: Iterable[Any] | None = None, state: bool = True
+    ) -> dict[Any, Any]:
+        """Refresh the last notice of site_ids now using an AsyncHyypClient."""
+        client = self._async_client()
+        now = time.monotonic()
+
+        if not self._sync_info:
+            self._sync_info = await client.get_sync_info()
+            self._last_refresh["sync"] = now
+
+        state = state or not self._state_info
+        self._invalidate_site_data(state)
+        _state_info = None
+        if state:
+            _state_info = await client.get_state_info()
+            self._last_refresh["state"] = now
+
+        self._last_notices.update(
+            await self._alarm_infos.async_last_notices(
+                self._site_targets(site_ids, _state_info)
+            )
+        )
+
+        if _state_info is not None:
+            self._state_info = _state_info
+
+        return self._merge()
+
+    def _run(self) -> None:
+        """Refresh sources until stopped."""
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+
+            except HyypApiError as err:
+                _LOGGER.warning("Error refreshing Hyyp data: %s", err)
+                self._stop.wait(self._intervals["state"])
+                continue
+
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected error refreshing Hyyp data")
+                self._stop.wait(self._intervals["state"])
+                continue
+
+            self._stop.wait(self.next_refresh_in())
+
+    def start(self) -> None:
+        """Start refreshing sources in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="HyypDataCoordinator", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresh thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,298 @@
+"""Dispatch push notifications to callbacks off the socket loop."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from enum import Enum
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUEUE = 100
+DEFAULT_WORKERS = 1
+
+
+class OverflowPolicy(Enum):
+    """What to do with a notification when the dispatch queue is full."""
+
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+
+
+def _notification_value(notification: Any, keys: tuple[str, ...]) -> str | None:
+    """Return the first of keys in a notification or its data, as string."""
+    if not isinstance(notification, dict):
+        return None
+
+    for payload in (notification, notification.get("data")):
+        if isinstance(payload, dict):
+            for key in keys:
+                if payload.get(key) is not None:
+                    return str(payload[key])
+
+    return None
+
+
+def notification_site_id(notification: Any) -> Any:
+    """Return the site id of a decrypted notification, None if missing."""
+    return _notification_value(notification, ("siteId", "site_id"))
+
+
+def notification_event_number(notification: Any) -> str | None:
+    """Return the constants.EventNumber key of a notification, None if missing."""
+    return _notification_value(notification, ("eventNumber", "event_number"))
+
+
+def notification_rpc_code(notification: Any) -> str | None:
+    """Return the RPC result code of a notification, None if missing."""
+    return _notification_value(notification, ("rpcCode", "rpc_code"))
+
+
+class _DispatchQueue:
+    """Bounded FIFO of callback arguments, optionally coalesced by key.
+
+    Not thread-safe, callers hold their own lock.
+    """
+
+    def __init__(
+        self,
+        max_queue: int,
+        overflow: OverflowPolicy,
+        coalesce_key: Callable[[Any], Hashable | None],
+    ) -> None:
+        """Initialize the queue."""
+        self._max_queue = max_queue
+        self._overflow = overflow
+        self._coalesce_key = coalesce_key
+        self._entries: deque[list[Any]] = deque()
+        self._pending: dict[Hashable, list[Any]] = {}
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        """Return number of queued notifications."""
+        return len(self._entries)
+
+    def full(self) -> bool:
+        """Return True if no notification can be added without dropping one."""
+        return len(self._entries) >= self._max_queue
+
+    def put(self, args: tuple[Any, ...]) -> None:
+        """Queue callback arguments, applying the overflow policy."""
+        key = None
+        if self._overflow is OverflowPolicy.COALESCE:
+            key = self._coalesce_key(args[1])
+            _entry = self._pending.get(key) if key is not None else None
+            if _entry is not None and self.full():
+                # Replace the latest queued notification of the site.
+                _entry[1] = args
+                self.dropped += 1
+                _LOGGER.debug("Dispatch queue full, coalesced a notification")
+                return
+
+        if self.full():
+            _oldest = self._entries.popleft()
+            if self._pending.get(_oldest[0]) is _oldest:
+                del self._pending[_oldest[0]]
+            self.dropped += 1
+            _LOGGER.debug("Dispatch queue full, dropped a notification")
+
+        _entry = [key, args]
+        self._entries.append(_entry)
+        if key is not None:
+            self._pending[key] = _entry
+
+    def pop(self) -> tuple[Any, ...]:
+        """Return the oldest queued callback arguments."""
+        _entry = self._entries.popleft()
+        if _entry[0] is not None and self._pending.get(_entry[0]) is _entry:
+            del self._pending[_entry[0]]
+        return _entry[1]
+
+
+class NotificationDispatcher:
+    """Run notification callbacks on worker threads.
+
+    Pass the dispatcher as listen() callback: the listener only queues the
+    notification and returns to reading the socket and answering heartbeats.
+    When the queue is full, DROP_OLDEST drops the oldest queued notification,
+    COALESCE replaces the latest queued notification of the same
+    coalesce_key(notification), the site id by default, dropping the oldest
+    otherwise. BLOCK waits for room, so a slow callback stalls the socket
+    loop again.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[Any, Any, Any], None],
+        workers: int = DEFAULT_WORKERS,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        coalesce_key: Callable[[Any], Hashable | None] = notification_site_id,
+    ) -> None:
+        """Initialize the dispatcher."""
+        self._callback = callback
+        self._workers = workers
+        self._overflow = overflow
+        self._queue = _DispatchQueue(max_queue, overflow, coalesce_key)
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._running = False
+
+    @property
+    def dropped(self) -> int:
+        """Return number of notifications dropped or coalesced."""
+        return self._queue.dropped
+
+    def __len__(self) -> int:
+        """Return number of queued notifications."""
+        return len(self._queue)
+
+    def __call__(self, obj: Any, notification: Any, data_message: Any) -> None:
+        """Queue a notification for the callback."""
+        with self._cond:
+            if not self._running:
+                self.start()
+
+            if self._overflow is OverflowPolicy.BLOCK:
+                while self._queue.full() and self._running:
+                    self._cond.wait()
+
+            self._queue.put((obj, notification, data_message))
+            self._cond.notify_all()
+
+    def _work(self) -> None:
+        """Run callbacks of queued notifications until stopped."""
+        while True:
+            with self._cond:
+                while not self._queue and self._running:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                args = self._queue.pop()
+                self._cond.notify_all()
+
+            try:
+                self._callback(*args)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error in notification callback")
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        with self._cond:
+            if self._running:
+                return
+
+            self._running = True
+            self._threads = [
+                threading.Thread(
+                    target=self._work, name=f"NotificationDispatcher-{index}"
+                )
+                for index in range(self._workers)
+            ]
+            for thread in self._threads:
+                thread.daemon = True
+                thread.start()
+
+    def stop(self) -> None:
+        """Deliver queued notifications and stop the worker threads."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+class AsyncNotificationDispatcher:
+    """Run notification callbacks on asyncio worker tasks.
+
+    Asyncio counterpart of NotificationDispatcher, the callback may be a
+    coroutine function. Pass it as async_listen() callback.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[Any, Any, Any], Awaitable[None] | None],
+        workers: int = DEFAULT_WORKERS,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        coalesce_key: Callable[[Any], Hashable | None] = notification_site_id,
+    ) -> None:
+        """Initialize the dispatcher."""
+        self._callback = callback
+        self._workers = workers
+        self._overflow = overflow
+        self._queue = _DispatchQueue(max_queue, overflow, coalesce_key)
+        self._cond: asyncio.Condition | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._running = False
+
+    @property
+    def dropped(self) -> int:
+        """Return number of notifications dropped or coalesced."""
+        return self._queue.dropped
+
+    def __len__(self) -> int:
+        """Return number of queued notifications."""
+        return len(self._queue)
+
+    async def __call__(self, obj: Any, notification: Any, data_message: Any) -> None:
+        """Queue a notification for the callback."""
+        if not self._running:
+            self.start()
+        assert self._cond is not None
+
+        async with self._cond:
+            if self._overflow is OverflowPolicy.BLOCK:
+                await self._cond.wait_for(
+                    lambda: not self._queue.full() or not self._running
+                )
+
+            self._queue.put((obj, notification, data_message))
+            self._cond.notify_all()
+
+    async def _work(self) -> None:
+        """Run callbacks of queued notifications until stopped."""
+        assert self._cond is not None
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._queue or not self._running)
+                if not self._queue:
+                    return
+                args = self._queue.pop()
+                self._cond.notify_all()
+
+            try:
+                result = self._callback(*args)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error in notification callback")
+
+    def start(self) -> None:
+        """Start the worker tasks on the running loop."""
+        if self._running:
+            return
+
+        self._running = True
+        self._cond = asyncio.Condition()
+        self._tasks = [
+            asyncio.ensure_future(self._work()) for _ in range(self._workers)
+        ]
+
+    async def stop(self) -> None:
+        """Deliver queued notifications and stop the worker tasks."""
+        if not self._running:
+            return
+
+        assert self._cond is not None
+        async with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
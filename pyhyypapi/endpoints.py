@@ -0,0 +1,241 @@
+"""Hyyp API endpoint registry."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import json
+from typing import Any, Mapping
+
+from .exceptions import HyypApiError
+
+BASE_URL = "ids.trintel.co.za/Inhep-Impl-1.0-SNAPSHOT/"
+API_ENDPOINT_LOGIN = "/auth/login"
+API_ENDPOINT_CHECK_APP_VERSION = "/auth/checkAppVersion"
+API_ENDPOINT_GET_SITE_NOTIFICATIONS = "/device/getSiteNotifications"
+API_ENDPOINT_SYNC_INFO = "/device/getSyncInfo"
+API_ENDPOINT_STATE_INFO = "/device/getStateInfo"
+API_ENDPOINT_NOTIFICATION_SUBSCRIPTIONS = "/device/getNotificationSubscriptions"
+API_ENDPOINT_GET_USER_PREFERANCES = "/user/getUserPreferences"
+API_ENDPOINT_SET_USER_PREFERANCE = "/user/setUserPreference"
+API_ENDPOINT_SECURITY_COMPANIES = "/security-companies/list"
+API_ENDPOINT_STORE_GCM_REGISTRATION_ID = "/user/storeGcmRegistrationId"
+API_ENDPOINT_ARM_SITE = "/device/armSite"
+API_ENDPOINT_TRIGGER_ALARM = "/device/triggerAlarm"
+API_ENDPOINT_SET_ZONE_BYPASS = "/device/bypass"
+API_ENDPOINT_GET_CAMERA_BY_PARTITION = "/device/getCameraByPartition"
+API_ENDPOINT_UPDATE_SUB_USER = "/user/updateSubUser"
+API_ENDPOINT_SET_NOTIFICATION_SUBSCRIPTIONS = "/user/setNotificationSubscriptionsNew"
+
+# Default response cache lifetimes (seconds) of slow changing endpoints.
+SYNC_INFO_CACHE_TTL = 60 * 60
+NOTIFICATION_SUBSCRIPTIONS_CACHE_TTL = 60 * 60
+SECURITY_COMPANIES_CACHE_TTL = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """Describe a Hyyp API endpoint.
+
+    name: registry key, also used as method name on the clients.
+    path: path appended to BASE_URL.
+    method: http verb.
+    error_msg: prefix of the HyypApiError raised on a failed status.
+    params: python argument name to API parameter name mapping.
+    imei_keys: parameter name(s) the device imei is sent as.
+    idempotent: safe to resend when the outcome of a request is unknown.
+    cache_ttl: default seconds a response may be served from a response cache.
+    invalidates: cached endpoints made stale by a call to this endpoint.
+    """
+
+    name: str
+    path: str
+    error_msg: str
+    method: str = "GET"
+    params: Mapping[str, str] = field(default_factory=dict)
+    imei_keys: tuple[str, ...] = ("imei",)
+    idempotent: bool = True
+    cache_ttl: float | None = None
+    invalidates: tuple[str, ...] = ()
+    url: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        """Precompute the full endpoint url."""
+        object.__setattr__(self, "url", "https://" + BASE_URL + self.path)
+
+    @property
+    def read_only(self) -> bool:
+        """Return True if identical concurrent calls may share one response."""
+        return self.method == "GET" and self.idempotent
+
+    def base_params(self, std_params: Mapping[str, Any]) -> dict[str, Any]:
+        """Return the standard parameters with imei renamed for this endpoint."""
+        _params = {key: value for key, value in std_params.items() if key != "imei"}
+        for imei_key in self.imei_keys:
+            _params[imei_key] = std_params["imei"]
+
+        return _params
+
+    def build_params(
+        self, base_params: Mapping[str, Any], kwargs: Mapping[str, Any]
+    ) -> dict[str, Any]:
+        """Merge call arguments, renamed to API names, into base parameters."""
+        _params = dict(base_params)
+        for key, value in kwargs.items():
+            _params[self.params.get(key, key)] = value
+
+        return _params
+
+    def decode(self, response_text: str) -> dict[Any, Any]:
+        """Decode response text and raise on an unsuccessful status."""
+        try:
+            _json_result: dict[Any, Any] = json.loads(response_text)
+
+        except ValueError as err:
+            raise HyypApiError(
+                "Impossible to decode response: "
+                + str(err)
+                + "\nResponse was: "
+                + str(response_text)
+            ) from err
+
+        if _json_result["status"] != "SUCCESS" and _json_result["error"] is not None:
+            raise HyypApiError(f"{self.error_msg}: {_json_result['error']}")
+
+        return _json_result
+
+
+def json_value(json_result: dict[Any, Any], json_key: Any = None) -> Any:
+    """Return json_result or only the value under json_key."""
+    if json_key is None:
+        return json_result
+
+    return json_result[json_key]
+
+
+ENDPOINTS: dict[str, Endpoint] = {
+    endpoint.name: endpoint
+    for endpoint in (
+        Endpoint("login", API_ENDPOINT_LOGIN, "Login error"),
+        Endpoint(
+            "check_app_version",
+            API_ENDPOINT_CHECK_APP_VERSION,
+            "Error checking app version from api",
+            imei_keys=("imei", "clientImei"),
+        ),
+        Endpoint(
+            "site_notifications",
+            API_ENDPOINT_GET_SITE_NOTIFICATIONS,
+            "Error getting site notifications from api",
+            params={"site_id": "siteId"},
+        ),
+        Endpoint(
+            "set_notification_subscriptions",
+            API_ENDPOINT_SET_NOTIFICATION_SUBSCRIPTIONS,
+            "Error getting site notifications from api",
+            method="POST",
+            params={
+                "trouble_notifications": "troubleNotifications",
+                "emergency_notifications": "emergencyNotifications",
+                "user_notifications": "userNotifications",
+                "information_notifications": "informationNotifications",
+                "test_report_notifications": "testReportNotifications",
+            },
+            imei_keys=("mobileImei",),
+            invalidates=("get_notification_subscriptions",),
+        ),
+        Endpoint(
+            "get_camera_by_partition",
+            API_ENDPOINT_GET_CAMERA_BY_PARTITION,
+            "Error getting partition cameras from api",
+            params={"partition_id": "partitionId"},
+        ),
+        Endpoint(
+            "get_sync_info",
+            API_ENDPOINT_SYNC_INFO,
+            "Error getting sync info from api",
+            cache_ttl=SYNC_INFO_CACHE_TTL,
+        ),
+        Endpoint(
+            "get_state_info",
+            API_ENDPOINT_STATE_INFO,
+            "Error getting state info from api",
+        ),
+        Endpoint(
+            "get_notification_subscriptions",
+            API_ENDPOINT_NOTIFICATION_SUBSCRIPTIONS,
+            "Error getting notification subscriptions",
+            cache_ttl=NOTIFICATION_SUBSCRIPTIONS_CACHE_TTL,
+        ),
+        Endpoint(
+            "get_user_preferences",
+            API_ENDPOINT_GET_USER_PREFERANCES,
+            "Error getting user preferences",
+            params={"user_id": "userId", "site_id": "siteId"},
+        ),
+        Endpoint(
+            "get_security_companies",
+            API_ENDPOINT_SECURITY_COMPANIES,
+            "Failed to get security companies",
+            cache_ttl=SECURITY_COMPANIES_CACHE_TTL,
+        ),
+        Endpoint(
+            "store_gcm_registrationid",
+            API_ENDPOINT_STORE_GCM_REGISTRATION_ID,
+            "Storing gcm id failed with",
+            method="POST",
+            params={"gcm_id": "gcmId"},
+            imei_keys=("clientImei",),
+        ),
+        Endpoint(
+            "set_user_preference",
+            API_ENDPOINT_SET_USER_PREFERANCE,
+            "Set user preferance failed with",
+            method="POST",
+            params={"site_id": "siteId"},
+            invalidates=("get_user_preferences",),
+        ),
+        Endpoint(
+            "set_subuser_preference",
+            API_ENDPOINT_UPDATE_SUB_USER,
+            "Updating sub user failed with",
+            method="POST",
+            params={"site_id": "siteId", "user_id": "userId"},
+            invalidates=("get_sync_info", "get_user_preferences"),
+        ),
+        Endpoint(
+            "arm_site",
+            API_ENDPOINT_ARM_SITE,
+            "Arm site failed",
+            params={
+                "partition_id": "partitionId",
+                "site_id": "siteId",
+                "stay_profile_id": "stayProfileId",
+            },
+            imei_keys=("clientImei",),
+            idempotent=False,
+        ),
+        Endpoint(
+            "trigger_alarm",
+            API_ENDPOINT_TRIGGER_ALARM,
+            "Trigger alarm failed",
+            method="POST",
+            params={
+                "partition_id": "partitionId",
+                "site_id": "siteId",
+                "trigger_id": "triggerId",
+            },
+            imei_keys=("clientImei",),
+            idempotent=False,
+        ),
+        Endpoint(
+            "set_zone_bypass",
+            API_ENDPOINT_SET_ZONE_BYPASS,
+            "Failed to set zone bypass",
+            params={
+                "partition_id": "partitionId",
+                "stay_profile_id": "stayProfileId",
+            },
+            imei_keys=("clientImei",),
+            idempotent=False,
+        ),
+    )
+}
@@ -11,3 +11,12 @@ class InvalidURL(HyypApiError):
 
 class HTTPError(HyypApiError):
     """Invalid host exception."""
+
+
+class HyypCommandError(HyypApiError):
+    """Alarm panel rejected a command."""
+
+    def __init__(self, rpc_code: str, message: str) -> None:
+        """Initialize the error with the constants.RpcCodes key and name."""
+        super().__init__(f"{message} ({rpc_code})")
+        self.rpc_code = rpc_code
@@ -0,0 +1,111 @@
+"""Buffered MCS frame decoder."""
+from __future__ import annotations
+
+import socket
+from typing import Union
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+COMPACT_THRESHOLD = 64 * 1024
+MAX_VARINT32_SHIFT = 28
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class McsFrameDecoder:
+    """Split a MCS byte stream into (tag, payload) frames.
+
+    Bytes are read in large chunks into one reusable bytearray and frame
+    headers (version, tag, varint size) are parsed in place. Payloads are
+    returned as memoryview slices of the buffer, only valid until the next
+    feed() or read_from() call.
+    """
+
+    def __init__(
+        self, expect_version: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+        """Initialize the decoder.
+
+        expect_version: the stream starts with the MCS version byte.
+        """
+        self.version: int | None = None
+        self._expect_version = expect_version
+        self._buffer = bytearray()
+        self._pos = 0
+        self._chunk_size = chunk_size
+        self._chunk: bytearray | None = None
+
+    def _compact(self) -> None:
+        """Drop consumed bytes from the buffer."""
+        if self._pos == len(self._buffer) or self._pos >= COMPACT_THRESHOLD:
+            try:
+                del self._buffer[: self._pos]
+            except BufferError:
+                # A returned payload view is still alive, don't resize it.
+                self._buffer = self._buffer[self._pos :]
+            self._pos = 0
+
+    def feed(self, data: Buffer) -> None:
+        """Append received bytes."""
+        self._compact()
+        try:
+            self._buffer += data
+        except BufferError:
+            self._buffer = self._buffer + data
+
+    def read_from(self, sock: socket.socket) -> int:
+        """Receive one chunk from sock, returns bytes read (0 on EOF)."""
+        if self._chunk is None:
+            # Only socket readers pay for the receive buffer.
+            self._chunk = bytearray(self._chunk_size)
+        size = sock.recv_into(self._chunk)
+        if size:
+            with memoryview(self._chunk) as view:
+                self.feed(view[:size])
+        return size
+
+    def next_frame(self) -> tuple[int, memoryview] | None:
+        """Return the next complete (tag, payload) frame, None if incomplete."""
+        buf = self._buffer
+        end = len(buf)
+        pos = self._pos
+
+        if self._expect_version:
+            if pos >= end:
+                return None
+            version = buf[pos]
+            pos += 1
+        else:
+            version = None
+
+        if pos >= end:
+            return None
+        tag = buf[pos]
+        pos += 1
+
+        size = 0
+        shift = 0
+        while True:
+            if pos >= end:
+                return None
+            byte = buf[pos]
+            pos += 1
+            size |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                break
+            shift += 7
+            if shift > MAX_VARINT32_SHIFT:
+                raise ValueError("Malformed MCS frame size")
+
+        if end - pos < size:
+            return None
+
+        if version is not None:
+            self.version = version
+            self._expect_version = False
+
+        self._pos = pos + size
+        return tag, memoryview(buf)[pos : self._pos]
+
+    def __len__(self) -> int:
+        """Return number of buffered, not yet decoded bytes."""
+        return len(self._buffer) - self._pos
@@ -0,0 +1,88 @@
+"""Client heartbeats and dead connection detection for MCS listeners."""
+from __future__ import annotations
+
+import logging
+import socket
+from typing import Any
+
+from .mcs_pb2 import HeartbeatPing
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_HEARTBEAT_INTERVAL_SECS = 60
+DEFAULT_HEARTBEAT_ACK_TIMEOUT_SECS = 10
+KEEPALIVE_IDLE_SECS = 30
+KEEPALIVE_INTERVAL_SECS = 10
+KEEPALIVE_COUNT = 3
+
+
+def set_keepalive(sock: Any) -> None:
+    """Enable TCP keepalive probes on sock where the platform supports them."""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option, value in (
+        ("TCP_KEEPIDLE", KEEPALIVE_IDLE_SECS),
+        ("TCP_KEEPALIVE", KEEPALIVE_IDLE_SECS),  # macOS name of TCP_KEEPIDLE
+        ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL_SECS),
+        ("TCP_KEEPCNT", KEEPALIVE_COUNT),
+    ):
+        if hasattr(socket, option):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+            except OSError as err:
+                _LOGGER.debug("Unable to set %s: %s", option, err)
+
+
+class McsHeartbeat:
+    """Schedule client heartbeat pings and detect unanswered ones.
+
+    Any packet received from the server proves the connection alive. When
+    nothing was received for interval seconds a HeartbeatPing is due, if still
+    nothing arrives within ack_timeout seconds the connection is dead. The
+    interval is shortened to the one requested in the LoginResponse.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_HEARTBEAT_INTERVAL_SECS,
+        ack_timeout: float = DEFAULT_HEARTBEAT_ACK_TIMEOUT_SECS,
+    ) -> None:
+        """Initialize the heartbeat schedule."""
+        self._interval = interval
+        self._ack_timeout = ack_timeout
+        self.interval = interval
+        self._last_received = 0.0
+        self._ping_sent: float | None = None
+
+    def start(self, login_response: Any, now: float) -> None:
+        """Start the schedule of a new connection."""
+        self.interval = self._interval
+        if login_response.HasField("heartbeat_config"):
+            interval_ms = login_response.heartbeat_config.interval_ms
+            if interval_ms:
+                self.interval = min(self._interval, interval_ms / 1000)
+        _LOGGER.debug("Heartbeat interval %ss", self.interval)
+        self.on_receive(now)
+
+    def on_receive(self, now: float) -> None:
+        """Record a packet received from the server."""
+        self._last_received = now
+        self._ping_sent = None
+
+    def timeout(self, now: float) -> float:
+        """Return seconds until the next ping or ack deadline."""
+        if self._ping_sent is not None:
+            return max(0.0, self._ping_sent + self._ack_timeout - now)
+        return max(0.0, self._last_received + self.interval - now)
+
+    def poll(self, now: float) -> HeartbeatPing | None:
+        """Return the ping to send if due, raise TimeoutError if unanswered."""
+        if self._ping_sent is not None:
+            if now - self._ping_sent >= self._ack_timeout:
+                raise TimeoutError("heartbeat not acknowledged")
+            return None
+
+        if now - self._last_received < self.interval:
+            return None
+
+        self._ping_sent = now
+        return HeartbeatPing()
@@ -0,0 +1,108 @@
+"""Reconnect state machine of MCS listeners."""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+import logging
+import random
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+MIN_RECONNECT_DELAY_SECS = 1.0
+MAX_RECONNECT_DELAY_SECS = 5 * 60.0
+MAX_ATTEMPTS_PER_WINDOW = 6
+ATTEMPT_WINDOW_SECS = 60.0
+
+
+class ConnectionState(Enum):
+    """State of a MCS listener connection."""
+
+    DISCONNECTED = "disconnected"
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    BACKOFF = "backoff"
+
+
+@dataclass
+class ReconnectMetrics:
+    """Connection counters of a MCS listener."""
+
+    attempts: int = 0
+    connects: int = 0
+    failures: int = 0
+    disconnects: int = 0
+    consecutive_failures: int = 0
+    last_error: str | None = None
+    last_connected: float | None = None
+    last_disconnected: float | None = None
+
+
+class McsReconnect:
+    """Track connection state and pace reconnect attempts.
+
+    Failed attempts back off exponentially with full jitter between
+    min_delay and max_delay seconds. Independently of the backoff, at most
+    max_attempts are made per window seconds, so a connection that drops
+    right after login does not reconnect in a tight loop either.
+    """
+
+    def __init__(
+        self,
+        min_delay: float = MIN_RECONNECT_DELAY_SECS,
+        max_delay: float = MAX_RECONNECT_DELAY_SECS,
+        max_attempts: int = MAX_ATTEMPTS_PER_WINDOW,
+        window: float = ATTEMPT_WINDOW_SECS,
+    ) -> None:
+        """Initialize the state machine."""
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._window = window
+        self._attempts: deque[float] = deque(maxlen=max_attempts)
+        self.state = ConnectionState.DISCONNECTED
+        self.metrics = ReconnectMetrics()
+
+    def _set_state(self, state: ConnectionState) -> None:
+        """Change state."""
+        _LOGGER.debug("Connection state %s -> %s", self.state.value, state.value)
+        self.state = state
+
+    def delay(self, now: float) -> float:
+        """Return seconds to wait before the next connection attempt."""
+        _delay = 0.0
+        failures = self.metrics.consecutive_failures
+        if failures:
+            _delay = random.uniform(
+                self._min_delay,
+                min(self._max_delay, self._min_delay * (2**failures)),
+            )
+
+        if len(self._attempts) == self._attempts.maxlen:
+            _delay = max(_delay, self._attempts[0] + self._window - now)
+
+        return max(0.0, _delay)
+
+    def connecting(self, now: float) -> None:
+        """Record the start of a connection attempt."""
+        self._attempts.append(now)
+        self.metrics.attempts += 1
+        self._set_state(ConnectionState.CONNECTING)
+
+    def connected(self) -> None:
+        """Record a successful login."""
+        self.metrics.connects += 1
+        self.metrics.consecutive_failures = 0
+        self.metrics.last_connected = time.time()
+        self._set_state(ConnectionState.CONNECTED)
+
+    def failed(self, error: BaseException | str) -> None:
+        """Record a failed connection attempt or a lost connection."""
+        if self.state is ConnectionState.CONNECTED:
+            self.metrics.disconnects += 1
+            self.metrics.last_disconnected = time.time()
+        else:
+            self.metrics.failures += 1
+            self.metrics.consecutive_failures += 1
+        self.metrics.last_error = str(error)
+        self._set_state(ConnectionState.BACKOFF)
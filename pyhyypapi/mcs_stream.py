@@ -0,0 +1,127 @@
+"""MCS stream id tracking and persistent id acknowledgement."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Iterable
+
+from .mcs_pb2 import IqStanza, SelectiveAck, StreamAck
+
+if TYPE_CHECKING:
+    from .persistent_id_store import PersistentIdStore
+
+SELECTIVE_ACK_EXTENSION_ID = 12
+STREAM_ACK_EXTENSION_ID = 13
+DEFAULT_ACK_INTERVAL = 10
+DEFAULT_MAX_RECENT_IDS = 1000
+
+
+def _has_stream_ids(packet: Any) -> bool:
+    """Return True if packet carries last_stream_id_received."""
+    return "last_stream_id_received" in packet.DESCRIPTOR.fields_by_name
+
+
+class McsStreamTracker:
+    """Acknowledge received persistent ids and forget them once confirmed.
+
+    Received ids are acked to the server with a StreamAck every ack_interval
+    messages, ids restored from a previous session with a SelectiveAck after
+    login. An acked batch is dropped when the server reports having received
+    the stream id of the ack. Until then the ids are sent again in the
+    LoginRequest of the next connection. Duplicate deliveries are detected
+    within the last max_recent_ids ids, or with store when passed.
+    """
+
+    def __init__(
+        self,
+        received_persistent_ids: Iterable[str] | None = None,
+        ack_interval: int = DEFAULT_ACK_INTERVAL,
+        max_recent_ids: int = DEFAULT_MAX_RECENT_IDS,
+        store: PersistentIdStore | None = None,
+    ) -> None:
+        """Initialize the tracker.
+
+        received_persistent_ids: ids received but not acked in a previous session.
+        store: persistent id store recording received ids.
+        """
+        self.stream_id_in = 0
+        self.stream_id_out = 0
+        self._ack_interval = ack_interval
+        self._max_recent_ids = max_recent_ids
+        self._store = store
+        self._restored: list[str] = list(received_persistent_ids or ())
+        self._unacked: list[str] = []
+        self._acked: dict[int, list[str]] = {}
+        self._recent: OrderedDict[str, None] = OrderedDict.fromkeys(self._restored)
+
+    @property
+    def persistent_ids(self) -> list[str]:
+        """Return received ids not confirmed as acked by the server."""
+        ids = list(self._restored)
+        for batch in self._acked.values():
+            ids.extend(batch)
+        ids.extend(self._unacked)
+        return ids
+
+    def reset(self) -> None:
+        """Start counting a new connection, unconfirmed ids are acked again."""
+        self._restored = self.persistent_ids
+        self._unacked = []
+        self._acked.clear()
+        self.stream_id_in = self.stream_id_out = 0
+
+    def on_send(self, packet: Any) -> None:
+        """Count an outgoing packet and stamp the last stream id received."""
+        self.stream_id_out += 1
+        if _has_stream_ids(packet):
+            packet.last_stream_id_received = self.stream_id_in
+
+    def on_receive(self, packet: Any) -> None:
+        """Count an incoming packet and drop acks the server confirmed."""
+        self.stream_id_in += 1
+        confirmed = getattr(packet, "last_stream_id_received", 0)
+        if confirmed:
+            for stream_id in [key for key in self._acked if key <= confirmed]:
+                del self._acked[stream_id]
+
+    def received(self, persistent_id: str) -> bool:
+        """Record a received data message, returns False for a duplicate."""
+        if self._store is not None:
+            if not self._store.add(persistent_id):
+                return False
+
+        elif persistent_id in self._recent:
+            return False
+
+        else:
+            self._recent[persistent_id] = None
+            if len(self._recent) > self._max_recent_ids:
+                self._recent.popitem(last=False)
+
+        self._unacked.append(persistent_id)
+        return True
+
+    def _iq(self, extension_id: int, extension: Any, ids: list[str]) -> IqStanza:
+        """Return an ack IqStanza, ids are confirmed with its stream id."""
+        self._acked[self.stream_id_out + 1] = ids
+        req = IqStanza()
+        req.type = IqStanza.SET
+        req.id = ""
+        req.extension.id = extension_id  # pylint: disable=maybe-no-member
+        req.extension.data = (  # pylint: disable=maybe-no-member
+            extension.SerializeToString()
+        )
+        return req
+
+    def ack(self) -> IqStanza | None:
+        """Return the ack due to be sent, if any."""
+        if self._restored:
+            ids, self._restored = self._restored, []
+            selective_ack = SelectiveAck()
+            selective_ack.id.extend(ids)  # pylint: disable=maybe-no-member
+            return self._iq(SELECTIVE_ACK_EXTENSION_ID, selective_ack, ids)
+
+        if len(self._unacked) >= self._ack_interval:
+            ids, self._unacked = self._unacked, []
+            return self._iq(STREAM_ACK_EXTENSION_ID, StreamAck(), ids)
+
+        return None
@@ -0,0 +1,170 @@
+"""Process-wide TLS context, TLS sessions and DNS cache of mtalk connections."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+import ssl
+import threading
+import time
+from typing import Any, List, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT_SECS = 10
+DNS_TTL_SECS = 5 * 60
+
+AddrInfo = Tuple[Any, ...]
+
+_LOCK = threading.Lock()
+_SSL_CONTEXT: ssl.SSLContext | None = None
+_SESSIONS: dict[tuple[str, int], ssl.SSLSession] = {}
+_ADDRESSES: dict[tuple[str, int], tuple[float, List[AddrInfo]]] = {}
+
+
+def ssl_context() -> ssl.SSLContext:
+    """Return the TLS context shared by all connections of the process."""
+    global _SSL_CONTEXT  # pylint: disable=global-statement
+    with _LOCK:
+        if _SSL_CONTEXT is None:
+            _SSL_CONTEXT = ssl.create_default_context()
+        return _SSL_CONTEXT
+
+
+def _cached_addresses(host: str, port: int, stale: bool = False) -> list[AddrInfo]:
+    """Return cached addresses of host, expired ones only if stale."""
+    with _LOCK:
+        cached = _ADDRESSES.get((host, port))
+    if cached is None or (not stale and time.monotonic() >= cached[0]):
+        return []
+    return cached[1]
+
+
+def _cache_addresses(host: str, port: int, addresses: list[AddrInfo]) -> None:
+    """Store resolved addresses of host."""
+    with _LOCK:
+        _ADDRESSES[(host, port)] = (time.monotonic() + DNS_TTL_SECS, addresses)
+
+
+def forget_addresses(host: str, port: int) -> None:
+    """Drop cached addresses of host, e.g. when none of them answers."""
+    with _LOCK:
+        _ADDRESSES.pop((host, port), None)
+
+
+def resolve(host: str, port: int) -> list[AddrInfo]:
+    """Return addresses of host, cached for DNS_TTL_SECS.
+
+    Expired addresses are still used when the resolver fails.
+    """
+    addresses = _cached_addresses(host, port)
+    if addresses:
+        return addresses
+
+    try:
+        addresses = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except OSError:
+        addresses = _cached_addresses(host, port, stale=True)
+        if not addresses:
+            raise
+        _LOGGER.debug("Resolving %s failed, using cached addresses", host)
+        return addresses
+
+    _cache_addresses(host, port, addresses)
+    return addresses
+
+
+async def async_resolve(host: str, port: int) -> list[AddrInfo]:
+    """Return addresses of host without blocking the event loop."""
+    addresses = _cached_addresses(host, port)
+    if addresses:
+        return addresses
+
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        )
+    except OSError:
+        addresses = _cached_addresses(host, port, stale=True)
+        if not addresses:
+            raise
+        _LOGGER.debug("Resolving %s failed, using cached addresses", host)
+        return addresses
+
+    _cache_addresses(host, port, addresses)
+    return addresses
+
+
+def store_tls_session(host: str, port: int, sock: ssl.SSLSocket) -> None:
+    """Keep the TLS session of sock to resume it on the next connection.
+
+    Call after data was read, TLS 1.3 tickets arrive after the handshake.
+    """
+    session = sock.session
+    if session is not None:
+        with _LOCK:
+            _SESSIONS[(host, port)] = session
+
+
+def open_tls_socket(
+    host: str, port: int, timeout: float = CONNECT_TIMEOUT_SECS
+) -> ssl.SSLSocket:
+    """Connect to host over TLS, resuming the last session when possible."""
+    last_error: OSError | None = None
+
+    for family, type_, proto, _, sockaddr in resolve(host, port):
+        with _LOCK:
+            session = _SESSIONS.get((host, port))
+        sock = socket.socket(family, type_, proto)
+        try:
+            sock.settimeout(timeout)
+            sock.connect(sockaddr)
+            tls_sock = ssl_context().wrap_socket(
+                sock, server_hostname=host, session=session
+            )
+        except OSError as err:
+            sock.close()
+            last_error = err
+            if session is not None and isinstance(err, ssl.SSLError):
+                with _LOCK:
+                    _SESSIONS.pop((host, port), None)
+            continue
+
+        tls_sock.settimeout(None)
+        _LOGGER.debug(
+            "Connected to %s (session reused: %s)", sockaddr, tls_sock.session_reused
+        )
+        return tls_sock
+
+    forget_addresses(host, port)
+    raise last_error or OSError(f"No address found for {host}")
+
+
+async def open_tls_connection(
+    host: str,
+    port: int,
+    context: ssl.SSLContext | None = None,
+    timeout: float = CONNECT_TIMEOUT_SECS,
+) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Open a TLS stream to host using the cached addresses.
+
+    asyncio offers no way to pass a TLS session, only the context is shared.
+    """
+    last_error: OSError | None = None
+
+    for _, _, _, _, sockaddr in await async_resolve(host, port):
+        try:
+            return await asyncio.wait_for(
+                asyncio.open_connection(
+                    sockaddr[0],
+                    sockaddr[1],
+                    ssl=context or ssl_context(),
+                    server_hostname=host,
+                ),
+                timeout,
+            )
+        except (OSError, asyncio.TimeoutError) as err:
+            last_error = err if isinstance(err, OSError) else TimeoutError(err)
+
+    forget_addresses(host, port)
+    raise last_error or OSError(f"No address found for {host}")
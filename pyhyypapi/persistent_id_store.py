@@ -0,0 +1,109 @@
+"""Persistent id store backed by a compacting append-only log."""
+from __future__ import annotations
+
+from collections import OrderedDict
+import logging
+import os
+from typing import Any, Iterator
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_IDS = 10000
+DEFAULT_RESTORED_IDS = 100
+COMPACT_FACTOR = 2
+
+
+class PersistentIdStore:
+    """Remember received persistent ids across listener restarts.
+
+    Ids are kept in an insertion ordered in-memory index for O(1) lookups and
+    appended to a log file, one id per line. Only the max_ids most recent ids
+    are kept, the log is rewritten once it holds COMPACT_FACTOR times as many
+    lines, which bounds both the file size and the startup time.
+    """
+
+    def __init__(self, path: str, max_ids: int = DEFAULT_MAX_IDS) -> None:
+        """Initialize the store and load the ids logged in path."""
+        self._path = path
+        self._max_ids = max_ids
+        self._ids: OrderedDict[str, None] = OrderedDict()
+        self._log_lines = 0
+
+        try:
+            with open(path, "r", encoding="UTF-8") as log_file:
+                for line in log_file:
+                    persistent_id = line.strip()
+                    if persistent_id:
+                        self._log_lines += 1
+                        self._remember(persistent_id)
+
+        except FileNotFoundError:
+            pass
+
+        self._log = open(path, "a", encoding="UTF-8")  # pylint: disable=R1732
+        if self._log_lines > len(self._ids):
+            self.compact()
+
+    def _remember(self, persistent_id: str) -> None:
+        """Add id to the in-memory index, evicting the oldest ids."""
+        self._ids[persistent_id] = None
+        self._ids.move_to_end(persistent_id)
+        if len(self._ids) > self._max_ids:
+            self._ids.popitem(last=False)
+
+    def __contains__(self, persistent_id: object) -> bool:
+        """Return True if persistent_id was received."""
+        return persistent_id in self._ids
+
+    def __len__(self) -> int:
+        """Return number of remembered ids."""
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over remembered ids, oldest first."""
+        return iter(list(self._ids))
+
+    def add(self, persistent_id: str) -> bool:
+        """Remember persistent_id, returns False if it was already known."""
+        if persistent_id in self._ids:
+            return False
+
+        self._remember(persistent_id)
+        self._log.write(persistent_id + "\n")
+        self._log.flush()
+        self._log_lines += 1
+
+        if self._log_lines > self._max_ids * COMPACT_FACTOR:
+            self.compact()
+        return True
+
+    def recent(self, count: int = DEFAULT_RESTORED_IDS) -> list[str]:
+        """Return the count most recently received ids."""
+        ids = list(self._ids)
+        return ids[-count:] if count else []
+
+    def compact(self) -> None:
+        """Rewrite the log with the remembered ids only."""
+        _LOGGER.debug("Compacting %s (%s lines)", self._path, self._log_lines)
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "w", encoding="UTF-8") as tmp_file:
+            tmp_file.writelines(persistent_id + "\n" for persistent_id in self._ids)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+
+        self._log.close()
+        os.replace(tmp_path, self._path)
+        self._log = open(self._path, "a", encoding="UTF-8")  # pylint: disable=R1732
+        self._log_lines = len(self._ids)
+
+    def close(self) -> None:
+        """Close the log file."""
+        self._log.close()
+
+    def __enter__(self) -> PersistentIdStore:
+        """Return the store."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close the store."""
+        self.close()
@@ -0,0 +1,247 @@
+"""Provision push credentials for many accounts."""
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Any, Iterator
+import uuid
+
+import requests
+
+from .push_receiver import (
+    REGISTER_WORKERS,
+    fcm_register,
+    gcm_check_in,
+    gcm_register,
+    generate_keys,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_KEY_POOL_SIZE = 32
+KEY_POOL_POLL_SECS = 0.5
+
+
+class KeyPairPool:
+    """Generate push encryption keys ahead of time in background threads.
+
+    get() takes a pre-generated key set, or generates one inline when the
+    pool ran dry, so it never waits for the background threads.
+    """
+
+    def __init__(self, size: int = DEFAULT_KEY_POOL_SIZE, workers: int = 1) -> None:
+        """Initialize the pool, call start() to fill it."""
+        self._queue: queue.Queue[dict[str, str]] = queue.Queue(maxsize=size)
+        self._workers = workers
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Return number of pre-generated key sets."""
+        return self._queue.qsize()
+
+    def _fill(self) -> None:
+        """Keep the pool full until stopped."""
+        while not self._stop.is_set():
+            try:
+                keys = generate_keys()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unable to generate keys")
+                self._stop.wait(KEY_POOL_POLL_SECS)
+                continue
+
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(keys, timeout=KEY_POOL_POLL_SECS)
+                    break
+                except queue.Full:
+                    pass
+
+    def start(self) -> None:
+        """Start the background threads."""
+        if self._threads:
+            return
+
+        self._stop.clear()
+        for index in range(self._workers):
+            thread = threading.Thread(
+                target=self._fill, name=f"KeyPairPool-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Stop the background threads."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def get(self) -> dict[str, str]:
+        """Return keys as returned by push_receiver.generate_keys()."""
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            self.misses += 1
+            return generate_keys()
+
+    def __enter__(self) -> KeyPairPool:
+        """Start the pool."""
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop the pool."""
+        self.stop()
+
+
+class CredentialsStore:
+    """Append-only JSON lines file of credentials, one set per line."""
+
+    def __init__(self, path: str) -> None:
+        """Initialize the store and load the credentials saved in path."""
+        self._path = path
+        self._credentials: list[dict[str, Any]] = []
+
+        try:
+            with open(path, "r", encoding="UTF-8") as store_file:
+                for line in store_file:
+                    if not line.strip():
+                        continue
+                    try:
+                        self._credentials.append(json.loads(line))
+                    except ValueError:
+                        _LOGGER.warning("Skipping truncated line in %s", path)
+
+        except FileNotFoundError:
+            pass
+
+        self._file = open(path, "a", encoding="UTF-8")  # pylint: disable=R1732
+
+    def __len__(self) -> int:
+        """Return number of stored credentials."""
+        return len(self._credentials)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """Iterate over stored credentials, oldest first."""
+        return iter(list(self._credentials))
+
+    def add(self, credentials: dict[str, Any]) -> None:
+        """Append credentials to the file."""
+        self._file.write(json.dumps(credentials) + "\n")
+        self._file.flush()
+        self._credentials.append(credentials)
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+    def __enter__(self) -> CredentialsStore:
+        """Return the store."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close the store."""
+        self.close()
+
+
+class ProvisioningPipeline:
+    """Register push credentials for many accounts concurrently.
+
+    Every account goes through check-in, GCM register and FCM subscribe on
+    one of workers threads, so the stages of different accounts overlap and
+    share the pooled HTTP session. Encryption keys come from a KeyPairPool.
+    The check-in result is kept in the credentials, so CheckinCache does not
+    repeat it before the first login.
+    """
+
+    def __init__(
+        self,
+        sender_id: int,
+        store: CredentialsStore | None = None,
+        workers: int = REGISTER_WORKERS,
+        key_pool: KeyPairPool | None = None,
+        session: requests.Session | None = None,
+    ) -> None:
+        """Initialize the pipeline.
+
+        store: any object whose add(credentials) is called as they complete.
+        key_pool: started pool of keys, a pool is run per run() call if None.
+        session: requests session to use instead of the shared one.
+        """
+        self._sender_id = sender_id
+        self._store = store
+        self._workers = workers
+        self._key_pool = key_pool
+        self._session = session
+        self.provisioned = 0
+        self.failed = 0
+
+    def _provision(self, key_pool: KeyPairPool) -> dict[str, Any]:
+        """Register credentials of one account."""
+        checkin = gcm_check_in(session=self._session)
+        checkin_time = time.time()
+
+        subscription = gcm_register(
+            appId=f"wp:receiver.push.com#{uuid.uuid4()}",
+            session=self._session,
+            checkin=checkin,
+        )
+        if subscription is None:
+            raise ConnectionError("gcm register failed")
+
+        credentials = {"gcm": subscription}
+        credentials.update(
+            fcm_register(
+                self._sender_id,
+                subscription["token"],
+                session=self._session,
+                keys=key_pool.get(),
+            )
+        )
+        credentials["checkin"] = {"time": checkin_time, "response": checkin}
+        return credentials
+
+    def run(self, count: int) -> Iterator[dict[str, Any]]:
+        """Provision count accounts, yield credentials as they complete.
+
+        Failed accounts are logged and counted in failed.
+        """
+        key_pool = self._key_pool
+        own_pool = key_pool is None
+        if key_pool is None:
+            key_pool = KeyPairPool(max(1, min(count, DEFAULT_KEY_POOL_SIZE)))
+            key_pool.start()
+
+        executor = ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="ProvisioningPipeline"
+        )
+        futures: list[Future] = []
+        try:
+            futures = [
+                executor.submit(self._provision, key_pool) for _ in range(count)
+            ]
+            for future in as_completed(futures):
+                try:
+                    credentials = future.result()
+                except Exception as err:  # pylint: disable=broad-except
+                    self.failed += 1
+                    _LOGGER.warning("Provisioning failed: %s", err)
+                    continue
+
+                self.provisioned += 1
+                if self._store is not None:
+                    self._store.add(credentials)
+                yield credentials
+
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            if own_pool:
+                key_pool.stop()
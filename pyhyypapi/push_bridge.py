@@ -0,0 +1,80 @@
+"""Refresh Hyyp alarm status on push notifications."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from .constants import EventNumber
+from .coordinator import HyypDataCoordinator
+from .dispatch import notification_event_number, notification_site_id
+from .exceptions import HyypApiError
+
+_LOGGER = logging.getLogger(__name__)
+
+# EventNumber keys of events changing armed partitions, stay profiles or
+# bypassed zones, i.e. the state info of a site.
+STATE_EVENTS = frozenset(
+    {
+        "0",  # Away arm
+        "1",  # Stay arm
+        "2",  # Disarm
+        "3",  # Alarm cancel
+        "7",  # Armed with bypassed zone
+        "8",  # Force armed
+        "11",  # Zone shutdown
+        "12",  # Zone shutdown restore
+        "43",  # Auto arm cancel
+        "54",  # Disarm from stay
+        "65",  # User bypassed zones
+        "87",  # User unbypassed zones
+        "91",  # TAG arming request
+        "92",  # Remote arming request
+    }
+)
+
+
+def refresh_plan(notification: Any) -> tuple[list[str] | None, bool]:
+    """Return site ids to refresh for a notification and if state is stale.
+
+    Site ids are None when the notification names no site. Events missing
+    from constants.EventNumber are assumed to change state.
+    """
+    site_id = notification_site_id(notification)
+    event_number = notification_event_number(notification)
+    state = event_number not in EventNumber or event_number in STATE_EVENTS
+    return (None if site_id is None else [site_id]), state
+
+
+class HyypPushBridge:
+    """Refresh a HyypDataCoordinator when a Hyyp push notification arrives.
+
+    Only the state info and the last notice of the notified site are
+    fetched, so the coordinator can poll rarely and still update within a
+    second. handle fits listen(), async_handle AsyncPushListenerManager.add.
+    Wrap handle in a NotificationDispatcher coalescing by
+    notification_site_id to keep requests off the socket thread.
+    """
+
+    def __init__(self, coordinator: HyypDataCoordinator) -> None:
+        """Initialize the bridge."""
+        self._coordinator = coordinator
+
+    def handle(self, obj: Any, notification: Any, data_message: Any = None) -> None:
+        """Refresh the sites of notification using a HyypClient."""
+        site_ids, state = refresh_plan(notification)
+        _LOGGER.debug("Push refresh of sites %s (state: %s)", site_ids, state)
+        try:
+            self._coordinator.refresh_sites(site_ids, state=state)
+        except HyypApiError as err:
+            _LOGGER.warning("Error refreshing Hyyp data after push: %s", err)
+
+    async def async_handle(
+        self, obj: Any, notification: Any, data_message: Any = None
+    ) -> None:
+        """Refresh the sites of notification using an AsyncHyypClient."""
+        site_ids, state = refresh_plan(notification)
+        _LOGGER.debug("Push refresh of sites %s (state: %s)", site_ids, state)
+        try:
+            await self._coordinator.async_refresh_sites(site_ids, state=state)
+        except HyypApiError as err:
+            _LOGGER.warning("Error refreshing Hyyp data after push: %s", err)
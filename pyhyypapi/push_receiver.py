@@ -2,17 +2,15 @@
 
 from base64 import b64encode, urlsafe_b64decode, urlsafe_b64encode
 from binascii import hexlify
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 import logging
 import os
 import os.path
 import select
 import socket
-import ssl
-import struct
+import threading
 import time
-from urllib.parse import urlencode
-from urllib.request import Request, urlopen
 import uuid
 
 import appdirs
@@ -21,10 +19,19 @@ from cryptography.hazmat.primitives import serialization
 from google.protobuf.json_format import MessageToDict
 import http_ece
 from oscrypto.asymmetric import generate_pair
+import requests
+from requests.adapters import HTTPAdapter
 
 from .android_checkin_pb2 import AndroidCheckinProto, ChromeBuildProto
 from .checkin_pb2 import AndroidCheckinRequest, AndroidCheckinResponse
 from .constants import GCF_SENDER_ID
+from .mcs_framing import McsFrameDecoder
+from .mcs_heartbeat import (
+    DEFAULT_HEARTBEAT_ACK_TIMEOUT_SECS,
+    DEFAULT_HEARTBEAT_INTERVAL_SECS,
+    McsHeartbeat,
+    set_keepalive,
+)
 from .mcs_pb2 import (
     Close,
     DataMessageStanza,
@@ -35,6 +42,11 @@ from .mcs_pb2 import (
     LoginResponse,
     StreamErrorStanza,
 )
+from .mcs_reconnect import McsReconnect
+from .mcs_stream import McsStreamTracker
+from .mcs_transport import open_tls_socket, store_tls_session
+from .persistent_id_store import PersistentIdStore
+from .retry import RetryPolicy
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -50,30 +62,60 @@ CHECKIN_URL = "https://android.clients.google.com/checkin"
 FCM_SUBSCRIBE = "https://fcm.googleapis.com/fcm/connect/subscribe"
 FCM_ENDPOINT = "https://fcm.googleapis.com/fcm/send"
 GOOGLE_MTALK_ENDPOINT = "mtalk.google.com"
+MTALK_PORT = 5228
 READ_TIMEOUT_SECS = 60 * 60
-MIN_RESET_INTERVAL_SECS = 60 * 5
+LOGIN_TIMEOUT_SECS = 10
+CHECKIN_VALIDITY_SECS = 2 * 24 * 60 * 60
+REQUEST_TIMEOUT_SECS = (5, 15)  # connect, read
+REGISTER_WORKERS = 8
+
+_HTTP_LOCK = threading.Lock()
+_HTTP_SESSION = None
+_RETRY_POLICY = RetryPolicy(max_retries=5)
 
 
-def __do_request(req, retries=5):
-    for _ in range(retries):
+def http_session():
+    """
+    returns the keep-alive session shared by check-in and registration
+    requests, sized for REGISTER_WORKERS concurrent requests per host
+    """
+    global _HTTP_SESSION  # pylint: disable=global-statement
+    with _HTTP_LOCK:
+        if _HTTP_SESSION is None:
+            _HTTP_SESSION = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=REGISTER_WORKERS)
+            _HTTP_SESSION.mount("https://", adapter)
+        return _HTTP_SESSION
+
+
+def __do_request(url, data, headers=None, retries=5, session=None):
+    session = session or http_session()
+    for attempt in range(retries):
         try:
-            resp = urlopen(req)
-            resp_data = resp.read()
-            resp.close()
-            _LOGGER.debug(resp_data)
-            return resp_data
-        except Exception as err:
+            resp = session.post(
+                url, data=data, headers=headers, timeout=REQUEST_TIMEOUT_SECS
+            )
+            resp.raise_for_status()
+            _LOGGER.debug(resp.content)
+            return resp.content
+        except requests.HTTPError as err:
             _LOGGER.debug("error during request", exc_info=err)
-            time.sleep(1)
+            if err.response.status_code not in _RETRY_POLICY.retry_statuses:
+                return None
+        except requests.RequestException as err:
+            _LOGGER.debug("error during request", exc_info=err)
+        if attempt + 1 < retries:
+            time.sleep(_RETRY_POLICY.backoff(attempt))
     return None
 
 
-def gcm_check_in(androidId=None, securityToken=None, **kwargs):
+def gcm_check_in(androidId=None, securityToken=None, session=None, **kwargs):
     """
     perform check-in request
 
     androidId, securityToken can be provided if we already did the initial
     check-in
+    session: requests session to use instead of the shared one
 
     returns dict with androidId, securityToken and more
     """
@@ -96,18 +138,83 @@ def gcm_check_in(androidId=None, securityToken=None, **kwargs):
         payload.security_token = int(securityToken)
 
     _LOGGER.debug(payload)
-    req = Request(
-        url=CHECKIN_URL,
+    resp_data = __do_request(
+        CHECKIN_URL,
+        payload.SerializeToString(),
         headers={"Content-Type": "application/x-protobuf"},
-        data=payload.SerializeToString(),
+        session=session,
     )
-    resp_data = __do_request(req)
+    if resp_data is None:
+        raise ConnectionError("check-in request failed")
     resp = AndroidCheckinResponse()
     resp.ParseFromString(resp_data)
     _LOGGER.debug(resp)
     return MessageToDict(resp)
 
 
+class CheckinCache:
+    """
+    reuses gcm check-in results stored in credentials["checkin"]
+
+    validity: seconds a check-in result is considered fresh
+    on_update(credentials): called after each check-in, e.g. to persist
+                            the credentials with their check-in result
+    """
+
+    def __init__(self, validity=CHECKIN_VALIDITY_SECS, on_update=None):
+        self._validity = validity
+        self._on_update = on_update
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+    def is_due(self, credentials):
+        """returns True if credentials hold no fresh check-in result"""
+        checkin = credentials.get("checkin")
+        return not checkin or time.time() - checkin["time"] >= self._validity
+
+    def check_in(self, credentials):
+        """performs a check-in and stores its result in credentials"""
+        response = gcm_check_in(**credentials["gcm"])
+        credentials["checkin"] = {"time": time.time(), "response": response}
+        if self._on_update is not None:
+            self._on_update(credentials)
+        return response
+
+    def __refresh(self, credentials, android_id):
+        try:
+            self.check_in(credentials)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Background check-in failed: %s", err)
+        finally:
+            with self._lock:
+                self._refreshing.discard(android_id)
+
+    def ensure(self, credentials):
+        """
+        makes sure credentials were checked in before login
+
+        only blocks when no check-in result was stored yet, stale results
+        are refreshed in a background thread
+        """
+        if "checkin" not in credentials:
+            return self.check_in(credentials)
+
+        if self.is_due(credentials):
+            android_id = credentials["gcm"]["androidId"]
+            with self._lock:
+                start = android_id not in self._refreshing
+                self._refreshing.add(android_id)
+            if start:
+                threading.Thread(
+                    target=self.__refresh,
+                    args=(credentials, android_id),
+                    name="CheckinCache",
+                    daemon=True,
+                ).start()
+
+        return credentials["checkin"]["response"]
+
+
 def urlsafe_base64(data):
     """
     base64-encodes data with -_ instead of +/ and removes all = padding.
@@ -119,18 +226,20 @@ def urlsafe_base64(data):
     return res.replace(b"\n", b"").decode("ascii")
 
 
-def gcm_register(appId, retries=5, **kwargs):
+def gcm_register(appId, retries=5, session=None, checkin=None, **kwargs):
     """
     obtains a gcm token
 
     appId: app id as an integer
     retries: number of failed requests before giving up
+    session: requests session to use instead of the shared one
+    checkin: result of a fresh gcm_check_in() to register, checks in if None
 
     returns {"token": "...", "appId": 123123, "androidId":123123,
              "securityToken": 123123}
     """
     # contains androidId, securityToken and more
-    chk = gcm_check_in()
+    chk = checkin or gcm_check_in(session=session)
     _LOGGER.debug(chk)
     body = {
         "app": "org.chromium.linux",
@@ -138,17 +247,22 @@ def gcm_register(appId, retries=5, **kwargs):
         "device": chk["androidId"],
         "sender": urlsafe_base64(SERVER_KEY),
     }
-    data = urlencode(body)
-    _LOGGER.debug(data)
+    _LOGGER.debug(body)
     auth = "AidLogin {}:{}".format(chk["androidId"], chk["securityToken"])
-    req = Request(
-        url=REGISTER_URL, headers={"Authorization": auth}, data=data.encode("utf-8")
-    )
-    for _ in range(retries):
-        resp_data = __do_request(req, retries)
+    for attempt in range(retries):
+        resp_data = __do_request(
+            REGISTER_URL,
+            body,
+            headers={"Authorization": auth},
+            retries=retries,
+            session=session,
+        )
+        if resp_data is None:
+            raise ConnectionError("gcm register request failed")
         if b"Error" in resp_data:
             err = resp_data.decode("utf-8")
-            _LOGGER.error("Register request has failed with %d", err)
+            _LOGGER.error("Register request has failed with %s", err)
+            time.sleep(_RETRY_POLICY.backoff(attempt))
             continue
         token = resp_data.decode("utf-8").split("=")[1]
         chkfields = {k: chk[k] for k in ["androidId", "securityToken"]}
@@ -158,14 +272,11 @@ def gcm_register(appId, retries=5, **kwargs):
     return None
 
 
-def fcm_register(sender_id, token, retries=5):
+def generate_keys():
     """
-    generates key pair and obtains a fcm token
+    generates the key pair and auth secret push messages are encrypted with
 
-    sender_id: sender id as an integer
-    token: the subscription token in the dict returned by gcm_register
-
-    returns {"keys": keys, "fcm": {...}}
+    returns {"public": "...", "private": "...", "secret": "..."}
     """
     # I used this analyzer to figure out how to slice the asn1 structs
     # https://lapo.it/asn1js
@@ -182,32 +293,74 @@ def fcm_register(sender_id, token, retries=5):
         "private": urlsafe_base64(private.asn1.dump()),
         "secret": urlsafe_base64(os.urandom(16)),
     }
-    data = urlencode(
-        {
-            "authorized_entity": sender_id,
-            "endpoint": "{}/{}".format(FCM_ENDPOINT, token),
-            "encryption_key": keys["public"],
-            "encryption_auth": keys["secret"],
-        }
-    )
+    return keys
+
+
+def fcm_register(sender_id, token, retries=5, session=None, keys=None):
+    """
+    generates key pair and obtains a fcm token
+
+    sender_id: sender id as an integer
+    token: the subscription token in the dict returned by gcm_register
+    session: requests session to use instead of the shared one
+    keys: keys returned by generate_keys(), generated if None
+
+    returns {"keys": keys, "fcm": {...}}
+    """
+    keys = keys or generate_keys()
+    data = {
+        "authorized_entity": sender_id,
+        "endpoint": "{}/{}".format(FCM_ENDPOINT, token),
+        "encryption_key": keys["public"],
+        "encryption_auth": keys["secret"],
+    }
     _LOGGER.debug(data)
-    req = Request(url=FCM_SUBSCRIBE, data=data.encode("utf-8"))
-    resp_data = __do_request(req, retries)
+    resp_data = __do_request(FCM_SUBSCRIBE, data, retries=retries, session=session)
+    if resp_data is None:
+        raise ConnectionError("fcm subscribe request failed")
     return {"keys": keys, "fcm": json.loads(resp_data.decode("utf-8"))}
 
 
-def register(sender_id):
+def register(sender_id, session=None):
     """register gcm and fcm tokens for sender_id"""
     app_id = "wp:receiver.push.com#{}".format(uuid.uuid4())
-    subscription = gcm_register(appId=app_id)
+    subscription = gcm_register(appId=app_id, session=session)
+    if subscription is None:
+        raise ConnectionError("gcm register failed")
     _LOGGER.debug(subscription)
-    fcm = fcm_register(sender_id=sender_id, token=subscription["token"])
+    fcm = fcm_register(
+        sender_id=sender_id, token=subscription["token"], session=session
+    )
     _LOGGER.debug(fcm)
     res = {"gcm": subscription}
     res.update(fcm)
     return res
 
 
+def register_many(sender_id, count, workers=REGISTER_WORKERS, session=None):
+    """
+    registers count credentials for sender_id concurrently
+
+    registrations share the pooled keep-alive session, failed ones are
+    logged and left out
+
+    returns a list of credentials objects as returned by register()
+    """
+    results = []
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="register"
+    ) as executor:
+        futures = [
+            executor.submit(register, sender_id, session) for _ in range(count)
+        ]
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.warning("Registration failed: %s", err)
+    return results
+
+
 # -------------------------------------------------------------------------
 
 
@@ -233,31 +386,14 @@ PACKET_BY_TAG = [
 ]
 
 
-def __read(sock, size):
-    buf = b""
-    while len(buf) < size:
-        buf += sock.recv(size - len(buf))
-    return buf
-
-
 # protobuf variable length integers are encoded in base 128
 # each byte contains 7 bits of the integer and the msb is set if there's
 # more. pretty simple to implement
 
 
-def __read_varint32(value):
-    res = 0
-    shift = 0
-    while True:
-        (b,) = struct.unpack("B", __read(value, 1))
-        res |= (b & 0x7F) << shift
-        if (b & 0x80) == 0:
-            break
-        shift += 7
-    return res
-
-
 def __encode_varint32(value):
+    if value == 0:
+        return b"\x00"
     res = bytearray([])
     while value != 0:
         b = value & 0x7F
@@ -268,63 +404,108 @@ def __encode_varint32(value):
     return bytes(res)
 
 
-def __send(google_socket, data):
+def _encode_packet(data):
+    """Serialize a MCS packet with its version, tag and size header."""
     header = bytearray([MCS_VERSION, PACKET_BY_TAG.index(type(data))])
     _LOGGER.debug(data)
     payload = data.SerializeToString()
     buf = bytes(header) + __encode_varint32(len(payload)) + payload
-    _LOGGER.debug(hexlify(buf))
-    total = 0
-    while total < len(buf):
-        sent = google_socket.send(buf[total:])
-        if sent == 0:
-            raise RuntimeError("socket connection broken")
-        total += sent
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug(hexlify(buf))
+    return buf
 
 
-def __recv(data, first=False):
+def _parse_packet(tag, buf):
+    """Parse a MCS packet payload, returns None for unsupported tags."""
+    _LOGGER.debug("tag %s (%s)", tag, PACKET_BY_TAG[tag])
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug(hexlify(buf))
+    packet = PACKET_BY_TAG[tag]
+    if isinstance(packet, str):
+        _LOGGER.debug("Ignoring unsupported packet %s", packet)
+        return None
+    payload = packet()
+    payload.ParseFromString(buf)
+    _LOGGER.debug(payload)
+    return payload
 
-    try:
-        readable, _, _ = select.select(
-            [
-                data,
-            ],
-            [],
-            [],
-            READ_TIMEOUT_SECS,
-        )
-        if len(readable) == 0:
-            _LOGGER.debug("Select read timeout")
-            return None
 
-    except select.error:
-        _LOGGER.debug("Select error")
-        return None
+def _check_version(version):
+    """Raise if the server MCS version is unsupported."""
+    _LOGGER.debug("version %s", version)
+    if version < MCS_VERSION and version != 38:
+        raise RuntimeError("protocol version {} unsupported".format(version))
 
-    _LOGGER.debug("Data available to read")
 
-    if first:
-        version, tag = struct.unpack("BB", __read(data, 2))
-        _LOGGER.debug("version %s", version)
-        if version < MCS_VERSION and version != 38:
-            raise RuntimeError("protocol version {} unsupported".format(version))
-    else:
-        (tag,) = struct.unpack("B", __read(data, 1))
-    _LOGGER.debug("tag %s (%s)", tag, PACKET_BY_TAG[tag])
-    size = __read_varint32(data)
-    _LOGGER.debug("size %s", size)
-    if size >= 0:
-        buf = __read(data, size)
-        _LOGGER.debug(hexlify(buf))
-        packet = PACKET_BY_TAG[tag]
-        payload = packet()
-        payload.ParseFromString(buf)
-        _LOGGER.debug(payload)
-        return payload
-    return None
+def __send(google_socket, data, tracker):
+    tracker.on_send(data)
+    buf = _encode_packet(data)
+    total = 0
+    while total < len(buf):
+        sent = google_socket.send(buf[total:])
+        if sent == 0:
+            raise ConnectionResetError("socket connection broken")
+        total += sent
 
 
-def __app_data_by_key(data, key, blow_shit_up=True):
+def __recv(
+    google_socket,
+    decoder,
+    tracker,
+    heartbeat=None,
+    first=False,
+    timeout=READ_TIMEOUT_SECS,
+):
+    while True:
+        frame = decoder.next_frame()
+        if frame is not None:
+            tag, payload = frame
+            if first:
+                _check_version(decoder.version)
+            _LOGGER.debug("size %s", len(payload))
+            packet = _parse_packet(tag, payload)
+            if heartbeat is not None:
+                heartbeat.on_receive(time.monotonic())
+            if packet is None:
+                continue
+            tracker.on_receive(packet)
+            return packet
+
+        # TLS may hold already decrypted bytes select() can't see
+        if not google_socket.pending():
+            if heartbeat is not None:
+                timeout = heartbeat.timeout(time.monotonic())
+            try:
+                readable, _, _ = select.select(
+                    [
+                        google_socket,
+                    ],
+                    [],
+                    [],
+                    timeout,
+                )
+            except select.error:
+                _LOGGER.debug("Select error")
+                return None
+
+            if len(readable) == 0:
+                if heartbeat is None:
+                    _LOGGER.debug("Select read timeout")
+                    return None
+                # raises TimeoutError when the last ping went unanswered
+                ping = heartbeat.poll(time.monotonic())
+                if ping is not None:
+                    _LOGGER.debug("Sending heartbeat ping")
+                    __send(google_socket, ping, tracker)
+                continue
+
+            _LOGGER.debug("Data available to read")
+
+        if decoder.read_from(google_socket) == 0:
+            raise ConnectionResetError("connection closed by server")
+
+
+def _app_data_by_key(data, key, blow_shit_up=True):
     for item in data.app_data:
         if item.key == key:
             return item.value
@@ -335,19 +516,14 @@ def __app_data_by_key(data, key, blow_shit_up=True):
 
 def __open():
 
-    context = ssl.create_default_context()
-    google_socket = socket.create_connection((GOOGLE_MTALK_ENDPOINT, 5228))
-    google_socket = context.wrap_socket(
-        google_socket, server_hostname=GOOGLE_MTALK_ENDPOINT
-    )
+    google_socket = open_tls_socket(GOOGLE_MTALK_ENDPOINT, MTALK_PORT)
+    set_keepalive(google_socket)
     _LOGGER.debug("connected to ssl socket")
     return google_socket
 
 
-def __login(credentials, persistent_ids):
-    google_socket = __open()
-
-    gcm_check_in(**credentials["gcm"])
+def _login_request(credentials, persistent_ids):
+    """Build the MCS login request for credentials."""
     req = LoginRequest()
     req.adaptive_heartbeat = False
     req.auth_service = 2
@@ -361,81 +537,189 @@ def __login(credentials, persistent_ids):
     req.use_rmq2 = True
     req.setting.add(name="new_vc", value="1")  # pylint: disable=maybe-no-member
     req.received_persistent_id.extend(persistent_ids)  # pylint: disable=maybe-no-member
-    __send(google_socket, req)
-    login_response = __recv(google_socket, first=True)
-    _LOGGER.debug("Received login response: %s", login_response)
-    return google_socket
+    return req
 
 
-def __reset(google_socket, credentials, persistent_ids):
-    last_reset = 0
-    now = time.time()
-    if now - last_reset < MIN_RESET_INTERVAL_SECS:
-        raise Exception("Too many connection reset attempts.")
-    last_reset = now
-    _LOGGER.debug("Reestablishing connection")
+def __close(google_socket):
     try:
-        google_socket.shutdown(2)
+        google_socket.shutdown(socket.SHUT_RDWR)
         google_socket.close()
     except OSError as err:
-        _LOGGER.debug("Unable to close connection %f", err)
-    return __login(credentials, persistent_ids)
+        _LOGGER.debug("Unable to close connection %s", err)
+
+
+def __login(credentials, tracker, heartbeat):
+    google_socket = __open()
+
+    try:
+        decoder = McsFrameDecoder()
+        tracker.reset()
+        __send(
+            google_socket, _login_request(credentials, tracker.persistent_ids), tracker
+        )
+        login_response = __recv(
+            google_socket, decoder, tracker, first=True, timeout=LOGIN_TIMEOUT_SECS
+        )
+        if login_response is None:
+            raise TimeoutError("no login response")
+        if not isinstance(login_response, LoginResponse):
+            raise ConnectionResetError(f"Unexpected login response {login_response}")
+        _LOGGER.debug("Received login response: %s", login_response)
+        heartbeat.start(login_response, time.monotonic())
+        store_tls_session(GOOGLE_MTALK_ENDPOINT, MTALK_PORT, google_socket)
+        __send_ack(google_socket, tracker)
+
+    except BaseException:
+        __close(google_socket)
+        raise
+
+    return google_socket, decoder
+
 
+def __send_ack(google_socket, tracker):
+    ack = tracker.ack()
+    if ack is not None:
+        __send(google_socket, ack, tracker)
 
-def __listen(credentials, callback, persistent_ids, obj):
-    google_socket = __login(credentials, persistent_ids)
 
+def __serve(google_socket, decoder, decryptor, callback, tracker, heartbeat, obj):
+    """Handle packets until the server closes the connection."""
     while True:
+        data = __recv(google_socket, decoder, tracker, heartbeat)
+        if isinstance(data, DataMessageStanza):
+            if tracker.received(data.persistent_id):
+                try:
+                    __handle_data_message(data, decryptor, callback, obj)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception(
+                        "Unable to handle data message %s", data.persistent_id
+                    )
+            __send_ack(google_socket, tracker)
+        elif isinstance(data, HeartbeatPing):
+            __handle_ping(google_socket, data, tracker)
+        elif data is None:
+            raise ConnectionResetError("select error")
+        elif isinstance(data, Close):
+            return "closed by server"
+        else:
+            _LOGGER.debug("Unexpected message type %s", type(data))
+
+
+def __listen(credentials, callback, tracker, heartbeat, reconnect, checkin_cache, obj):
+    decryptor = PushDecryptor(credentials)
+
+    while True:
+        delay = reconnect.delay(time.monotonic())
+        if delay:
+            _LOGGER.debug("Reconnecting in %.1fs", delay)
+            time.sleep(delay)
+
+        reconnect.connecting(time.monotonic())
         try:
-            data = __recv(google_socket)
-            if isinstance(data, DataMessageStanza):
-                msg_id = __handle_data_message(data, credentials, callback, obj)
-                persistent_ids.append(msg_id)
-            elif isinstance(data, HeartbeatPing):
-                __handle_ping(google_socket, data)
-            elif data is None or isinstance(data, Close):
-                google_socket = __reset(google_socket, credentials, persistent_ids)
-            else:
-                _LOGGER.debug("Unexpected message type %s", type(data))
-        except ConnectionResetError:
-            _LOGGER.debug("Connection Reset: Reconnecting")
-            google_socket = __login(credentials, persistent_ids)
-
-
-def __handle_data_message(data, credentials, callback, obj):
-    load_der_private_key = serialization.load_der_private_key
-
-    crypto_key = __app_data_by_key(
-        data, "crypto-key", blow_shit_up=False
-    )  # Can be None
-    if crypto_key:
-        crypto_key = crypto_key[3:]  # strip dh=
-
-    salt = __app_data_by_key(data, "encryption", blow_shit_up=False)  # Can be None
-    if salt:
-        salt = salt[5:]  # strip salt=
-
-    crypto_key = urlsafe_b64decode(crypto_key.encode("ascii"))
-    salt = urlsafe_b64decode(salt.encode("ascii"))
-    der_data = credentials["keys"]["private"]
-    der_data = urlsafe_b64decode(der_data.encode("ascii") + b"========")
-    secret = credentials["keys"]["secret"]
-    secret = urlsafe_b64decode(secret.encode("ascii") + b"========")
-    privkey = load_der_private_key(der_data, password=None, backend=default_backend())
-    decrypted = http_ece.decrypt(
-        data.raw_data,
-        salt=salt,
-        private_key=privkey,
-        dh=crypto_key,
-        version="aesgcm",
-        auth_secret=secret,
-    )
-    _LOGGER.debug("Received data message %s: %s", data.persistent_id, decrypted)
-    callback(obj, json.loads(decrypted.decode("utf-8")), data)
+            checkin_cache.ensure(credentials)
+            google_socket, decoder = __login(credentials, tracker, heartbeat)
+
+        except OSError as err:
+            _LOGGER.debug("Connect failed: %s", err)
+            reconnect.failed(err)
+            continue
+
+        reconnect.connected()
+        try:
+            reason = __serve(
+                google_socket, decoder, decryptor, callback, tracker, heartbeat, obj
+            )
+        except OSError as err:
+            reason = err
+        finally:
+            __close(google_socket)
+
+        _LOGGER.debug("Connection lost: %s, reconnecting", reason)
+        reconnect.failed(reason)
+
+
+def _urlsafe_b64decode(data):
+    return urlsafe_b64decode(data.encode("ascii") + b"========")
+
+
+class PushDecryptor:
+    """
+    decrypts data messages with keys parsed once per credentials set
+
+    credential sets are keyed by their fcm token
+    """
+
+    def __init__(self, *credentials):
+        self._keys = {}
+        for _credentials in credentials:
+            self.add(_credentials)
+
+    def add(self, credentials):
+        """parse and store the keys of credentials, returns its fcm token"""
+        token = credentials["fcm"]["token"]
+        if token not in self._keys:
+            private_key = serialization.load_der_private_key(
+                _urlsafe_b64decode(credentials["keys"]["private"]),
+                password=None,
+                backend=default_backend(),
+            )
+            secret = _urlsafe_b64decode(credentials["keys"]["secret"])
+            self._keys[token] = (private_key, secret)
+        return token
+
+    def remove(self, token):
+        """forget the keys of fcm token"""
+        self._keys.pop(token, None)
+
+    def __contains__(self, token):
+        return token in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def decrypt(self, data, token=None):
+        """
+        decrypt the payload of a data message, returns the decoded json
+
+        token: fcm token the message was sent to, may be omitted when a
+               single credentials set is known
+        """
+        if token is None:
+            if len(self._keys) != 1:
+                raise KeyError("fcm token required with several credentials")
+            private_key, secret = next(iter(self._keys.values()))
+        else:
+            private_key, secret = self._keys[token]
+
+        crypto_key = _app_data_by_key(
+            data, "crypto-key", blow_shit_up=False
+        )  # Can be None
+        if crypto_key:
+            crypto_key = crypto_key[3:]  # strip dh=
+
+        salt = _app_data_by_key(data, "encryption", blow_shit_up=False)  # Can be None
+        if salt:
+            salt = salt[5:]  # strip salt=
+
+        decrypted = http_ece.decrypt(
+            data.raw_data,
+            salt=urlsafe_b64decode(salt.encode("ascii")),
+            private_key=private_key,
+            dh=urlsafe_b64decode(crypto_key.encode("ascii")),
+            version="aesgcm",
+            auth_secret=secret,
+        )
+        _LOGGER.debug("Received data message %s: %s", data.persistent_id, decrypted)
+        return json.loads(decrypted.decode("utf-8"))
+
+
+def __handle_data_message(data, decryptor, callback, obj):
+    callback(obj, decryptor.decrypt(data), data)
     return data.persistent_id
 
 
-def __handle_ping(google_socket, data):
+def _heartbeat_ack(data):
+    """Build the ack answering a server heartbeat ping."""
     _LOGGER.debug(
         "Responding to ping: Stream ID: %s, Last: %s, Status: %s",
         data.stream_id,
@@ -446,24 +730,57 @@ def __handle_ping(google_socket, data):
     req.stream_id = data.stream_id + 1
     req.last_stream_id_received = data.stream_id
     req.status = data.status
-    __send(google_socket, req)
+    return req
+
 
+def __handle_ping(google_socket, data, tracker):
+    __send(google_socket, _heartbeat_ack(data), tracker)
 
-def listen(credentials, callback, received_persistent_ids=None, obj=None):
+
+def listen(
+    credentials,
+    callback,
+    received_persistent_ids=None,
+    obj=None,
+    persistent_id_store=None,
+    heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL_SECS,
+    heartbeat_ack_timeout=DEFAULT_HEARTBEAT_ACK_TIMEOUT_SECS,
+    reconnect=None,
+    checkin_cache=None,
+):
     """
     listens for push notifications
 
     credentials: credentials object returned by register()
     callback(obj, notification, data_message): called on notifications
     received_persistent_ids: any persistent id's you already received.
-                             array of strings
+                             array of strings, acked to the server on login
     obj: optional arbitrary value passed to callback
+    persistent_id_store: optional PersistentIdStore used to skip duplicates,
+                         its most recent ids are acked on login when
+                         received_persistent_ids is not given
+    heartbeat_interval: seconds without traffic before pinging the server,
+                        shortened to the interval the server asks for
+    heartbeat_ack_timeout: seconds to wait for an answer to a ping before
+                           reconnecting
+    reconnect: optional McsReconnect pacing reconnects, its metrics
+               count connection attempts and drops
+    checkin_cache: optional CheckinCache, by default check-ins are only
+                   repeated when older than CHECKIN_VALIDITY_SECS
     """
 
-    if received_persistent_ids is None:
-        received_persistent_ids = []
-
-    __listen(credentials, callback, received_persistent_ids, obj)
+    if received_persistent_ids is None and persistent_id_store is not None:
+        received_persistent_ids = persistent_id_store.recent()
+
+    tracker = McsStreamTracker(received_persistent_ids, store=persistent_id_store)
+    heartbeat = McsHeartbeat(heartbeat_interval, heartbeat_ack_timeout)
+    if reconnect is None:
+        reconnect = McsReconnect()
+    if checkin_cache is None:
+        checkin_cache = CheckinCache()
+    __listen(
+        credentials, callback, tracker, heartbeat, reconnect, checkin_cache, obj
+    )
 
 
 def run_example():
@@ -492,16 +809,17 @@ def run_example():
     print("send notifications to {}".format(credentials["fcm"]["token"]))
 
     def on_notification(obj, notification, data_message):
-        idstr = data_message.persistent_id + "\n"
-        with open(persistent_ids_path, "r", encoding="UTF-8") as cred_file:
-            if idstr in cred_file:
-                return
-        with open(persistent_ids_path, "a", encoding="UTF-8") as cred_file:
-            cred_file.write(idstr)
         print("Notification: \n")
         print(json.dumps(notification, indent=2))
 
-    with open(persistent_ids_path, "a+", encoding="UTF-8") as cred_file:
-        received_persistent_ids = [x.strip() for x in cred_file]
+    def on_checkin(credentials):
+        with open(credentials_path, "w", encoding="UTF-8") as cred_file:
+            json.dump(credentials, cred_file)
 
-    listen(credentials, on_notification, received_persistent_ids)
+    with PersistentIdStore(persistent_ids_path) as persistent_id_store:
+        listen(
+            credentials,
+            on_notification,
+            persistent_id_store=persistent_id_store,
+            checkin_cache=CheckinCache(on_update=on_checkin),
+        )
@@ -0,0 +1,151 @@
+"""Hyyp API retry policy."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import logging
+import random
+import threading
+from typing import TYPE_CHECKING
+
+from .constants import MAX_RETRIES
+
+if TYPE_CHECKING:
+    from .endpoints import Endpoint
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_MAX_BACKOFF = 30.0
+DEFAULT_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_BUDGET_CAPACITY = 10.0
+DEFAULT_BUDGET_RATIO = 0.2
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return Retry-After header value in seconds."""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+
+    except ValueError:
+        pass
+
+    try:
+        _retry_at = parsedate_to_datetime(value)
+
+    except (TypeError, ValueError):
+        return None
+
+    if _retry_at.tzinfo is None:
+        _retry_at = _retry_at.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (_retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of successful requests.
+
+    Every retry withdraws one token, every success deposits ratio tokens.
+    Share one budget between clients to cap retries fleet wide.
+    """
+
+    def __init__(
+        self,
+        capacity: float = DEFAULT_BUDGET_CAPACITY,
+        ratio: float = DEFAULT_BUDGET_RATIO,
+    ) -> None:
+        """Initialize the budget."""
+        self._capacity = capacity
+        self._ratio = ratio
+        self._tokens = capacity
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """Record a successful request."""
+        with self._lock:
+            self._tokens = min(self._capacity, self._tokens + self._ratio)
+
+    def withdraw(self) -> bool:
+        """Take a token for a retry, return False if the budget is spent."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    """Decide if and when a failed request is retried.
+
+    Requests to endpoints that are not idempotent (arm, bypass toggle,
+    trigger alarm) are only retried when the server never received them.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        retry_statuses: frozenset[int] = DEFAULT_RETRY_STATUSES,
+        budget: RetryBudget | None = None,
+    ) -> None:
+        """Initialize the policy."""
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+        self.budget = budget or RetryBudget()
+
+    def backoff(self, attempt: int) -> float:
+        """Return exponential backoff with full jitter for attempt."""
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff_factor * (2**attempt))
+        )
+
+    def retry_delay(
+        self,
+        endpoint: Endpoint,
+        attempt: int,
+        status: int | None = None,
+        request_sent: bool = True,
+        retry_after: str | None = None,
+    ) -> float | None:
+        """Return seconds to wait before retrying, or None to give up.
+
+        status: http status of the failed response, None on connection errors.
+        request_sent: False when the request never reached the server.
+        retry_after: Retry-After header of the failed response.
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        if status is not None:
+            if status not in self.retry_statuses:
+                return None
+            request_sent = status != 429
+
+        if request_sent and not endpoint.idempotent:
+            return None
+
+        _delay = self.backoff(attempt)
+        _retry_after = parse_retry_after(retry_after)
+        if _retry_after is not None:
+            if _retry_after > self.max_backoff:
+                return None
+            _delay = max(_delay, _retry_after)
+
+        if not self.budget.withdraw():
+            _LOGGER.debug("Retry budget exhausted, not retrying %s", endpoint.name)
+            return None
+
+        _LOGGER.debug(
+            "Retrying %s in %.2fs (attempt %s)", endpoint.name, _delay, attempt + 1
+        )
+        return _delay
+
+    def record_success(self) -> None:
+        """Record a successful request in the retry budget."""
+        self.budget.deposit()
@@ -19,6 +19,7 @@ setuptools.setup(
     ],
     install_requires=[
         'requests',
+        'aiohttp',
         'pandas',
         'oscrypto',
         'protobuf',
@@ -0,0 +1,51 @@
+"""Tests for the notification dispatcher."""
+import threading
+
+from pyhyypapi.dispatch import NotificationDispatcher, OverflowPolicy
+
+
+def test_coalesce_keeps_site_events_with_free_space():
+    """Notifications of one site are all delivered while the queue has room."""
+    delivered = []
+    release = threading.Event()
+
+    def callback(obj, notification, data_message):
+        release.wait(5)
+        delivered.append(notification["eventNumber"])
+
+    dispatcher = NotificationDispatcher(
+        callback, max_queue=100, overflow=OverflowPolicy.COALESCE
+    )
+    for event_number in ("0", "5", "3"):
+        dispatcher(None, {"siteId": "1", "eventNumber": event_number}, None)
+    release.set()
+    dispatcher.stop()
+
+    assert delivered == ["0", "5", "3"]
+    assert dispatcher.dropped == 0
+
+
+def test_coalesce_replaces_site_event_when_full():
+    """A full queue replaces the queued notification of the same site."""
+    delivered = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def callback(obj, notification, data_message):
+        started.set()
+        release.wait(5)
+        delivered.append(notification["eventNumber"])
+
+    dispatcher = NotificationDispatcher(
+        callback, max_queue=2, overflow=OverflowPolicy.COALESCE
+    )
+    dispatcher(None, {"siteId": "1", "eventNumber": "0"}, None)
+    started.wait(5)
+    dispatcher(None, {"siteId": "1", "eventNumber": "5"}, None)
+    dispatcher(None, {"siteId": "2", "eventNumber": "1"}, None)
+    dispatcher(None, {"siteId": "1", "eventNumber": "3"}, None)
+    release.set()
+    dispatcher.stop()
+
+    assert delivered == ["0", "3", "1"]
+    assert dispatcher.dropped == 1
@@ -0,0 +1,124 @@
+"""Tests for the blocking push notification listener."""
+import socket
+import time
+
+import pytest
+
+from pyhyypapi import push_receiver
+from pyhyypapi.mcs_reconnect import McsReconnect
+from pyhyypapi.mcs_framing import McsFrameDecoder
+from pyhyypapi.mcs_pb2 import DataMessageStanza
+
+
+class _Stop(Exception):
+    """Raised to leave the listen loop."""
+
+
+class _Socket:
+    """Connected socket without buffered TLS data."""
+
+    def __init__(self, sock):
+        self._sock = sock
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def pending(self):
+        return 0
+
+    def send(self, data):
+        return self._sock.send(data)
+
+    def recv_into(self, buffer):
+        return self._sock.recv_into(buffer)
+
+    def shutdown(self, how):
+        self._sock.shutdown(how)
+
+    def close(self):
+        self._sock.close()
+
+
+class _Reconnect(McsReconnect):
+    """Record the reason of the first lost connection and stop listening."""
+
+    reason = None
+
+    def failed(self, error):
+        super().failed(error)
+        self.reason = error
+        raise _Stop
+
+
+class _CheckinCache:
+    def ensure(self, credentials):
+        pass
+
+
+def test_unanswered_heartbeat_reconnects_with_timeout(monkeypatch):
+    """A ping without answer is reported as heartbeat timeout."""
+    server, client = socket.socketpair()
+
+    def login(credentials, tracker, heartbeat):
+        heartbeat.on_receive(time.monotonic())
+        return _Socket(client), McsFrameDecoder()
+
+    monkeypatch.setattr(push_receiver, "__login", login)
+    monkeypatch.setattr(push_receiver, "PushDecryptor", lambda *credentials: None)
+    reconnect = _Reconnect()
+
+    with pytest.raises(_Stop):
+        push_receiver.listen(
+            {},
+            lambda obj, notification, data_message: None,
+            heartbeat_interval=0.05,
+            heartbeat_ack_timeout=0.05,
+            reconnect=reconnect,
+            checkin_cache=_CheckinCache(),
+        )
+    server.close()
+
+    assert isinstance(reconnect.reason, TimeoutError)
+    assert str(reconnect.reason) == "heartbeat not acknowledged"
+
+
+class _Decryptor:
+    """Fail to decrypt the first data message."""
+
+    def decrypt(self, data):
+        if data.persistent_id == "bad":
+            raise ValueError("undecryptable")
+        return {"persistent_id": data.persistent_id}
+
+
+def test_bad_data_message_keeps_listening(monkeypatch):
+    """A data message failing to decrypt is skipped."""
+    server, client = socket.socketpair()
+    packets = []
+    for persistent_id in ("bad", "good"):
+        message = DataMessageStanza(persistent_id=persistent_id, category="c")
+        setattr(message, "from", "f")
+        packets.append(push_receiver._encode_packet(message))
+    # The version byte only starts the stream.
+    server.sendall(packets[0] + packets[1][1:])
+    server.close()
+
+    def login(credentials, tracker, heartbeat):
+        heartbeat.on_receive(time.monotonic())
+        return _Socket(client), McsFrameDecoder()
+
+    monkeypatch.setattr(push_receiver, "__login", login)
+    monkeypatch.setattr(push_receiver, "PushDecryptor", lambda *c: _Decryptor())
+    received = []
+    reconnect = _Reconnect()
+
+    with pytest.raises(_Stop):
+        push_receiver.listen(
+            {},
+            lambda obj, notification, data_message: received.append(notification),
+            reconnect=reconnect,
+            checkin_cache=_CheckinCache(),
+        )
+
+    assert received == [{"persistent_id": "good"}]
+    assert isinstance(reconnect.reason, ConnectionResetError)